@@ -0,0 +1,104 @@
+import os
+from functools import lru_cache
+
+from PIL import Image, ImageFont
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ICON_DIR = os.path.join(BASE_DIR, "icons")
+
+# Every font the card uses: name -> (file, size)
+FONT_SPECS = {
+    "header": ("Bourgeois-Bold.ttf", 29),       # Player Name
+    "mode_title": ("Bourgeois-Medium.ttf", 26), # Mode Titles
+    "mode_reward": ("Bourgeois-Bold.ttf", 27),  # Season reward level
+    "rank_name": ("Bourgeois-Bold.ttf", 33),    # Rank (Champion I, etc)
+    "stats": ("Bourgeois-Medium.ttf", 23),      # Sub-stats
+    "mmr": ("Bourgeois-Medium.ttf", 24),        # Sub-stats
+}
+
+RANK_ICON_SIZE = (105, 105)
+UNRANKED_ICON_SIZE = (110, 110)
+PLATFORM_ICON_SIZE = (50, 38)
+ROW_ICON_SIZE = (46, 46)  # leaderboard rows
+
+PLATFORMS = ["epic", "steam", "xbl", "psn"]
+DEFAULT_PLATFORM = "epic"
+
+RANK_TIERS = ["bronze", "silver", "gold", "platinum", "diamond", "champion", "grand_champion"]
+REQUIRED_RANK_ICONS = [f"{t}_{n}" for t in RANK_TIERS for n in (1, 2, 3)] + ["supersonic_legend", "unranked"]
+
+ROMAN = {"1": "I", "2": "II", "3": "III"}
+
+
+def tier_file_key(tier):
+    """Maps a tracker tier name ("Diamond II") to its icon file stem ("diamond_2")."""
+    return tier.lower().replace(" ", "_").replace("_iii", "_3").replace("_ii", "_2").replace("_i", "_1")
+
+
+def tier_display_name(stem):
+    """Maps an icon file stem ("grand_champion_2") back to a tier name ("Grand Champion II")."""
+    words = stem.split("_")
+    if words[-1] in ROMAN:
+        words[-1] = ROMAN[words[-1]]
+    return " ".join(w if w in ROMAN.values() else w.capitalize() for w in words)
+
+
+def _load_icon(path, size):
+    with Image.open(path) as img:
+        icon = img.convert("RGBA").resize(size)
+    icon.load()
+    return icon
+
+
+class AssetRegistry:
+    """Fonts and icons decoded and resized once, so renders never hit the disk."""
+
+    def __init__(self, base_dir=BASE_DIR):
+        icon_dir = os.path.join(base_dir, "icons")
+
+        missing = [f for f, _ in FONT_SPECS.values() if not os.path.exists(os.path.join(base_dir, f))]
+        missing += [f"icons/{p}.png" for p in PLATFORMS if not os.path.exists(os.path.join(icon_dir, f"{p}.png"))]
+        missing += [f"icons/{r}.png" for r in REQUIRED_RANK_ICONS if not os.path.exists(os.path.join(icon_dir, f"{r}.png"))]
+        if missing:
+            raise FileNotFoundError(f"Missing card assets: {', '.join(sorted(set(missing)))}")
+
+        self.fonts = {
+            name: ImageFont.truetype(os.path.join(base_dir, file), size)
+            for name, (file, size) in FONT_SPECS.items()
+        }
+
+        self.platform_icons = {
+            p: _load_icon(os.path.join(icon_dir, f"{p}.png"), PLATFORM_ICON_SIZE) for p in PLATFORMS
+        }
+
+        # Rank icons are keyed by both the tracker tier name and the file stem
+        self.rank_icons = {}
+        self.row_rank_icons = {}
+        for filename in sorted(os.listdir(icon_dir)):
+            stem, ext = os.path.splitext(filename)
+            if ext.lower() != ".png" or stem in self.platform_icons:
+                continue
+            icon = _load_icon(os.path.join(icon_dir, filename), RANK_ICON_SIZE)
+            self.rank_icons[stem] = icon
+            self.rank_icons[tier_display_name(stem)] = icon
+            row_icon = _load_icon(os.path.join(icon_dir, filename), ROW_ICON_SIZE)
+            self.row_rank_icons[stem] = row_icon
+            self.row_rank_icons[tier_display_name(stem)] = row_icon
+
+        self.unranked_icon = _load_icon(os.path.join(icon_dir, "unranked.png"), UNRANKED_ICON_SIZE)
+
+    def platform_icon(self, platform_name):
+        input_plat = platform_name.lower().split()[0]
+        return self.platform_icons.get(input_plat, self.platform_icons[DEFAULT_PLATFORM])
+
+    def rank_icon(self, tier, row=False):
+        icons = self.row_rank_icons if row else self.rank_icons
+        icon = icons.get(tier)
+        if icon is None:
+            icon = icons.get(tier_file_key(tier))
+        return icon
+
+
+@lru_cache(maxsize=1)
+def get_assets():
+    return AssetRegistry()
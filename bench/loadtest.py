@@ -0,0 +1,346 @@
+"""Load test: the real command and button handlers against a local tracker.gg stub.
+
+Starts an HTTP stub of the profile endpoint (serving bench/fixtures with
+configurable latency, errors and 403/429 bursts), points the bot at it,
+then fires /rank, /rankme, /ranklink and card button clicks through fake
+interactions. Nothing talks to Discord or tracker.gg:
+
+    python bench/loadtest.py                              # 500 commands at 50/s
+    python bench/loadtest.py --commands 2000 --rate 200 --players 300
+    python bench/loadtest.py --burst-every 15 --burst-status 429
+    UPSTREAM_RATE=20 RENDER_WORKERS=4 python bench/loadtest.py
+
+Bot settings (UPSTREAM_RATE, PROFILE_CACHE_TTL, RENDER_WORKERS, ...) are
+read from the environment as usual. The report covers event loop lag,
+end-to-end latency per command, throughput, replies by outcome and what
+the stub saw upstream.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from run import load_fixtures  # noqa: E402
+
+PROFILE_PATH = "/api/v2/rocket-league/standard/profile/"
+PLATFORMS = [("Epic Games", "epic"), ("Steam", "steam"), ("PlayStation", "psn"), ("Xbox", "xbl")]
+MIX = {"rank": 0.5, "rankme": 0.2, "button": 0.2, "ranklink": 0.1}
+
+
+# --- TRACKER STUB ---
+class TrackerStub:
+    """Minimal keep-alive HTTP server for the profile endpoint."""
+
+    def __init__(self, args):
+        self.args = args
+        self.bodies = [raw for _, _, raw in load_fixtures().values()]
+        self.started = time.monotonic()
+        self.status_counts = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def pick_status(self, username):
+        """(status, retry_after) for one request."""
+        args = self.args
+        if args.burst_every:
+            # The first burst starts burst_every seconds in
+            phase = (time.monotonic() - self.started) % args.burst_every
+            if time.monotonic() - self.started >= args.burst_every and phase < args.burst_seconds:
+                return args.burst_status, args.burst_seconds - phase
+        if username.startswith("ghost"):
+            return 404, None
+        if random.random() < args.error_rate:
+            return 500, None
+        return 200, None
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                path = request_line.decode(errors="replace").split()[1]
+
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                try:
+                    await asyncio.sleep(max(0.0, random.uniform(
+                        self.args.latency_ms - self.args.jitter_ms, self.args.latency_ms + self.args.jitter_ms
+                    )) / 1000)
+                finally:
+                    self.in_flight -= 1
+
+                username = path.rsplit("/", 1)[-1]
+                status, retry_after = self.pick_status(username)
+                self.status_counts[status] += 1
+                body = self.bodies[hash(username) % len(self.bodies)] if status == 200 else b'{"errors":[]}'
+                headers = f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                if retry_after is not None:
+                    headers += f"Retry-After: {retry_after:.0f}\r\n"
+                writer.write(headers.encode() + b"\r\n" + body)
+                await writer.drain()
+        except (ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, port):
+        return await asyncio.start_server(self.handle, "127.0.0.1", port)
+
+
+# --- FAKE DISCORD ---
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+    async def send_message(self, content=None, **kwargs):
+        self.done = True
+        self.interaction.reply(content, **kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self.interaction.reply(content, **kwargs)
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the bot's handlers."""
+
+    def __init__(self, user_id, guild_id=1):
+        import discord
+        self.created_at = discord.utils.utcnow()
+        self.started = time.perf_counter()
+        self.user = FakeUser(user_id)
+        self.guild_id = guild_id
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.first_reply = None
+        self.outcome = None
+        self.bytes_sent = 0
+
+    def reply(self, content, file=None, **kwargs):
+        if self.first_reply is None:
+            self.first_reply = time.perf_counter()
+            if file is not None:
+                self.outcome = "card"
+                self.bytes_sent = len(file.fp.getvalue())
+            else:
+                # "❌ 404: Player ..." -> "❌ 404:"; "⏳ Tracker.gg is ..." -> "⏳ Tracker.gg"
+                self.outcome = " ".join((content or "").split()[:2])
+
+    async def edit_original_response(self, content=None, attachments=(), **kwargs):
+        self.reply(content, file=attachments[0] if attachments else None)
+
+
+# --- DRIVER ---
+def percentiles(samples):
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": samples[-1]}
+
+
+async def monitor_loop_lag(samples, interval=0.05):
+    """Measures how late a short sleep wakes up: time the loop spent blocked."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run(args, stub):
+    from discord import app_commands
+
+    import rlbot
+    from db import Database
+
+    bot = rlbot.bot
+    bot.db = Database(os.path.join(args.workdir, "loadtest.db"))
+    bot.cards.store = None
+    bot._connection.application_id = 0
+
+    async def no_sync():
+        pass
+    bot.sync_commands = no_sync  # nothing to sync against
+
+    server = await stub.start(args.port)
+    await bot.setup_hook()
+    await bot.get_renderer()
+
+    players = [
+        (PLATFORMS[i % len(PLATFORMS)], f"ghost{i}" if random.random() < args.missing_rate else f"player{i}")
+        for i in range(args.players)
+    ]
+    # Every fake user starts out linked to one player, so /rankme has work to do
+    for user_id, ((_, slug), username) in enumerate(players, start=1000):
+        await bot.db.link_user(user_id, username, slug)
+
+    def command_for(kind):
+        user_id = random.randrange(1000, 1000 + len(players))
+        (label, slug), username = random.choice(players)
+        interaction = FakeInteraction(user_id)
+        if kind == "rank":
+            return interaction, rlbot.rank.callback(interaction, app_commands.Choice(name=label, value=slug), username)
+        if kind == "rankme":
+            return interaction, rlbot.rankme.callback(interaction)
+        if kind == "ranklink":
+            return interaction, rlbot.ranklink.callback(interaction, app_commands.Choice(name=label, value=slug), username)
+        mode = random.choice(["standard", "extras"])
+        if random.random() < 0.5:
+            button = rlbot.ModeButton(slug, username, mode)
+        else:
+            # A card drawn from whatever the bot has cached, as if from an earlier /rank
+            profile = bot.tracker.cache.peek((slug, username.lower()))
+            if profile is not None:
+                digest = rlbot.card_digest(slug, username, profile, mode)
+                button = rlbot.UpdateButton(slug, username, mode, profile.fetched_at, digest)
+            else:
+                button = rlbot.UpdateButton(slug, username, mode, int(time.time()) - random.randrange(600))
+        return interaction, button.callback(interaction)
+
+    lag = []
+    lag_task = asyncio.create_task(monitor_loop_lag(lag))
+    done = []
+
+    async def issue(kind):
+        interaction, coro = command_for(kind)
+        try:
+            await coro
+        except Exception as e:
+            interaction.outcome = interaction.outcome or f"exception {type(e).__name__}"
+        done.append((kind, interaction))
+
+    kinds, weights = zip(*MIX.items())
+    tasks = []
+    started = time.perf_counter()
+    for _ in range(args.commands):
+        tasks.append(asyncio.create_task(issue(random.choices(kinds, weights)[0])))
+        # Poisson arrivals at --rate commands per second
+        await asyncio.sleep(random.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    lag_task.cancel()
+    stats = {
+        "limiter": bot.tracker.limiter.stats(),
+        "profile_cache": bot.tracker.cache.stats(),
+        "card_cache": bot.cards.stats(),
+        "phases": {name: percentiles(list(samples)) for name, samples in rlbot.metrics.histograms.items()},
+    }
+    await bot.close()
+    server.close()
+    return done, elapsed, lag, stats
+
+
+def report(args, done, elapsed, lag, stats, stub):
+    ms = lambda seconds: f"{seconds * 1000:8.1f}"
+    print(f"{len(done)} commands in {elapsed:.1f}s: {len(done) / elapsed:.1f}/s "
+          f"(offered {args.rate}/s, {args.players} players)")
+
+    print(f"\n{'latency (ms)':16} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'n':>6}")
+    by_kind = defaultdict(list)
+    for kind, interaction in done:
+        if interaction.first_reply is not None:
+            by_kind[kind].append(interaction.first_reply - interaction.started)
+            by_kind["all"].append(interaction.first_reply - interaction.started)
+    for kind, samples in sorted(by_kind.items()):
+        q = percentiles(samples)
+        print(f"{kind:16} {ms(q['p50'])} {ms(q['p95'])} {ms(q['p99'])} {ms(q['max'])} {len(samples):>6}")
+    q = percentiles(lag)
+    if q:
+        print(f"{'loop lag':16} {ms(q['p50'])} {ms(q['p95'])} {ms(q['p99'])} {ms(q['max'])} {len(lag):>6}")
+
+    print(f"\n{'phase (ms)':16} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, q in sorted(stats["phases"].items()):
+        if q:
+            print(f"{name:16} {ms(q['p50'])} {ms(q['p95'])} {ms(q['p99'])} {ms(q['max'])}")
+
+    print("\nReplies")
+    for outcome, count in Counter(i.outcome or "no reply" for _, i in done).most_common():
+        print(f"  {outcome}: {count}")
+    cards = [i.bytes_sent for _, i in done if i.outcome == "card"]
+    if cards:
+        print(f"  mean card size: {statistics.fmean(cards) / 1024:.1f} KiB")
+
+    upstream = sum(stub.status_counts.values())
+    print(f"\nUpstream: {upstream} calls ({upstream / max(len(done), 1):.2f} per command), "
+          f"max {stub.max_in_flight} in flight, statuses {dict(sorted(stub.status_counts.items()))}")
+    limiter = stats["limiter"]
+    print(f"Limiter: state {limiter['state']}, rate {limiter['rate']}/s, sent {limiter['sent']}, rejected {limiter['rejected']}")
+    cache = stats["profile_cache"]
+    print(f"Profile cache: hit rate {cache['hit_rate']:.2f}, coalesced {cache['coalesced']}, saved calls {cache['saved_calls']}")
+    cards = stats["card_cache"]
+    print(f"Card cache: hit rate {cards['hit_rate']:.2f}, entries {cards['entries']}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=500, help="commands to send")
+    parser.add_argument("--rate", type=float, default=50, help="mean arrivals per second")
+    parser.add_argument("--players", type=int, default=200, help="distinct players (and linked users)")
+    parser.add_argument("--missing-rate", type=float, default=0.02, help="share of players the stub answers 404 for")
+    parser.add_argument("--latency-ms", type=float, default=150, help="stub response time")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="uniform +/- jitter on the response time")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="share of 500 responses")
+    parser.add_argument("--burst-every", type=float, default=0, help="seconds between 403/429 bursts (0: none)")
+    parser.add_argument("--burst-seconds", type=float, default=3, help="length of each burst")
+    parser.add_argument("--burst-status", type=int, default=429, choices=[403, 429])
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own logging")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    args.port = free_port()
+    args.workdir = tempfile.mkdtemp(prefix="rlbot-loadtest-")
+    # Read by tracker.py at import time
+    os.environ["TRACKER_PROFILE_URL"] = f"http://127.0.0.1:{args.port}{PROFILE_PATH}{{platform}}/{{username}}"
+
+    stub = TrackerStub(args)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with quiet:
+            done, elapsed, lag, stats = asyncio.run(run(args, stub))
+    finally:
+        shutil.rmtree(args.workdir, ignore_errors=True)
+    report(args, done, elapsed, lag, stats, stub)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Offline benchmarks for the card renderer and the fetch-parse-render pipeline.
+
+Runs against the recorded tracker.gg profiles in bench/fixtures, so it needs
+neither Discord nor network access:
+
+    python bench/run.py                   # print results
+    python bench/run.py --save-baseline   # write bench/baseline.json
+    python bench/run.py --compare         # exit 1 if slower/bigger than the baseline
+
+The encode table compares the output settings in card.py (CARD_FORMAT,
+CARD_PALETTE_COLORS, CARD_COMPRESS_LEVEL, CARD_SCALE); upload_ms estimates
+the transfer time over --uplink-kbps.
+
+Memory is the peak RSS growth of one render in a fresh process, which
+includes Pillow's image buffers (tracemalloc only sees Python objects).
+
+Timings are machine-specific: save the baseline on the box you compare on.
+"""
+import argparse
+import ctypes
+import gc
+import json
+import os
+import resource
+import statistics
+import sys
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from card import draw_rank_card, draw_slanted_gradient, encode_card, render_rank_card, warm_up  # noqa: E402
+from cardspec import CARD_ENCODING, CardEncoding  # noqa: E402
+from models import parse_profile  # noqa: E402
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+MODES = ["standard", "extras"]
+RSS_SLACK_KIB = 1024  # page and allocator noise allowed on top of --tolerance
+
+# Output settings compared by bench_encode; "configured" is whatever the env selects
+ENCODINGS = {
+    "configured": CARD_ENCODING,
+    "png": CardEncoding("png", 0, 6, 1),
+    "png_fast": CardEncoding("png", 0, 1, 1),
+    "png_palette": CardEncoding("png", 256, 6, 1),
+    "png_palette_max": CardEncoding("png", 256, 9, 1),
+    "webp_lossless": CardEncoding("webp", 0, 4, 1),
+    "webp_lossless_fast": CardEncoding("webp", 0, 1, 1),
+    "preview_half": CardEncoding("png", 256, 6, 0.5),
+}
+
+
+def load_fixtures():
+    """Returns {name: (handle, platform, raw body)}."""
+    fixtures = {}
+    for filename in sorted(os.listdir(FIXTURE_DIR)):
+        if filename.endswith(".json"):
+            with open(os.path.join(FIXTURE_DIR, filename), "rb") as f:
+                raw = f.read()
+            info = json.loads(raw)['data']['platformInfo']
+            fixtures[filename[:-5]] = (info['platformUserHandle'], info['platformSlug'], raw)
+    return fixtures
+
+
+def parse_and_render(fixture, mode_type="standard"):
+    """Same work the bot does on a 200 response: parse the body, render the card."""
+    handle, platform, raw = fixture
+    return render_rank_card(handle, platform, handle, parse_profile(raw), mode_type=mode_type)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def proc_status_kib(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def render_peak_rss(fixture, mode):
+    """Runs in a fresh process: KiB the peak RSS grows by for one render after warm-up."""
+    from PIL import Image
+    warm_up()
+    # Hand back what warm-up freed, or the render reuses it without growing RSS
+    gc.collect()
+    Image.core.clear_cache()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    try:
+        # Linux: reset the high-water mark, which warm-up has pushed above any render
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        before = proc_status_kib("VmRSS")
+        parse_and_render(fixture, mode)
+        return proc_status_kib("VmHWM") - before
+    except OSError:
+        # Elsewhere only growth past warm-up's peak shows (ru_maxrss is KiB on Linux, bytes on macOS)
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        parse_and_render(fixture, mode)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+
+def bench_render(fixtures, iterations):
+    results = {}
+    # One process per measurement, so earlier renders don't hide the peak
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1) as pool:
+        for name, fixture in fixtures.items():
+            handle, platform, raw = fixture
+            profile = parse_profile(raw)
+            for mode in MODES:
+                timings = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    png = render_rank_card(handle, platform, handle, profile, mode_type=mode)
+                    timings.append(time.perf_counter() - start)
+
+                results[f"{name}/{mode}"] = {
+                    **percentiles(timings),
+                    "png_bytes": len(png),
+                    "peak_rss_kib": pool.submit(render_peak_rss, fixture, mode).result(),
+                }
+    return results
+
+
+def bench_encode(fixtures, iterations, uplink_kbps):
+    """Encode time and bytes for every ENCODINGS entry, over all fixtures and modes."""
+    images = [
+        draw_rank_card(handle, platform, handle, parse_profile(raw), mode_type=mode)
+        for handle, platform, raw in fixtures.values() for mode in MODES
+    ]
+    results = {}
+    for name, encoding in ENCODINGS.items():
+        timings, sizes = [], []
+        for _ in range(max(1, iterations // len(images))):
+            for image in images:
+                start = time.perf_counter()
+                sizes.append(len(encode_card(image, encoding)))
+                timings.append(time.perf_counter() - start)
+        mean_bytes = statistics.fmean(sizes)
+        results[name] = {
+            **percentiles(timings),
+            "mean_bytes": round(mean_bytes),
+            # Rough time to push the file through a slow uplink
+            "upload_ms": round(mean_bytes * 8 / uplink_kbps, 1),
+        }
+    return results
+
+
+def bench_gradient(iterations):
+    from PIL import Image, ImageDraw
+    base = Image.new("RGBA", (900, 600))
+    draw = ImageDraw.Draw(base)
+    args = ((85, 200, 255, 100), (170, 100, 255, 100), [(25, 20), (450, 20), (420, 85), (25, 85)])
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        draw_slanted_gradient(draw, base, *args)
+        timings.append(time.perf_counter() - start)
+    return percentiles(timings)
+
+
+def bench_throughput(fixtures, seconds, workers):
+    """End-to-end parse+render cards per second, in-process or across worker processes."""
+    jobs = [(fixture, mode) for fixture in fixtures.values() for mode in MODES]
+    done = 0
+    start = time.perf_counter()
+    if workers <= 1:
+        while time.perf_counter() - start < seconds:
+            fixture, mode = jobs[done % len(jobs)]
+            parse_and_render(fixture, mode)
+            done += 1
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as pool:
+            # Let every worker build its assets before the clock starts
+            list(pool.map(parse_and_render, [jobs[0][0]] * workers))
+            start = time.perf_counter()
+            while time.perf_counter() - start < seconds:
+                batch = [jobs[(done + i) % len(jobs)] for i in range(workers * 4)]
+                list(pool.map(parse_and_render, *zip(*batch)))
+                done += len(batch)
+    return round(done / (time.perf_counter() - start), 1)
+
+
+def run(iterations, seconds, workers, uplink_kbps):
+    fixtures = load_fixtures()
+    warm_up()
+    results = {
+        "render": bench_render(fixtures, iterations),
+        "encode": bench_encode(fixtures, iterations, uplink_kbps),
+        "gradient": bench_gradient(iterations),
+        "throughput_cards_per_s": {"1": bench_throughput(fixtures, seconds, 1)},
+    }
+    if workers > 1:
+        results["throughput_cards_per_s"][str(workers)] = bench_throughput(fixtures, seconds, workers)
+    # ru_maxrss is KiB on Linux
+    results["max_rss_mib"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions beyond `tolerance` (0.25 = 25% worse)."""
+    regressions = []
+    for key, base in baseline.get("render", {}).items():
+        current = results["render"].get(key)
+        if current is None:
+            continue
+        if current["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p50 {base['p50_ms']}ms -> {current['p50_ms']}ms")
+        if current["png_bytes"] > base["png_bytes"] * (1 + tolerance):
+            regressions.append(f"{key}: png {base['png_bytes']}B -> {current['png_bytes']}B")
+        if "peak_rss_kib" in base and current["peak_rss_kib"] > base["peak_rss_kib"] * (1 + tolerance) + RSS_SLACK_KIB:
+            regressions.append(f"{key}: peak RSS {base['peak_rss_kib']}KiB -> {current['peak_rss_kib']}KiB")
+    for name, base in baseline.get("encode", {}).items():
+        current = results["encode"].get(name)
+        if current is None:
+            continue
+        if current["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"encode {name}: p50 {base['p50_ms']}ms -> {current['p50_ms']}ms")
+        if current["mean_bytes"] > base["mean_bytes"] * (1 + tolerance):
+            regressions.append(f"encode {name}: {base['mean_bytes']}B -> {current['mean_bytes']}B")
+    if "max_rss_mib" in baseline and results["max_rss_mib"] > baseline["max_rss_mib"] * (1 + tolerance):
+        regressions.append(f"max RSS: {baseline['max_rss_mib']}MiB -> {results['max_rss_mib']}MiB")
+    for workers, base in baseline.get("throughput_cards_per_s", {}).items():
+        current = results["throughput_cards_per_s"].get(workers)
+        if current is not None and current < base * (1 - tolerance):
+            regressions.append(f"throughput x{workers}: {base}/s -> {current}/s")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'fixture/mode':32} {'p50':>8} {'p95':>8} {'p99':>8} {'png KiB':>9} {'peak RSS KiB':>13}")
+    for key, r in results["render"].items():
+        print(f"{key:32} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['png_bytes'] / 1024:>9.1f} {r['peak_rss_kib']:>13}")
+    print()
+    print(f"{'encoding':32} {'p50':>8} {'p95':>8} {'KiB':>9} {'upload ms':>12}")
+    for name, r in results["encode"].items():
+        print(f"{name:32} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['mean_bytes'] / 1024:>9.1f} {r['upload_ms']:>12}")
+    print()
+    g = results["gradient"]
+    print(f"{'draw_slanted_gradient':32} {g['p50_ms']:>8} {g['p95_ms']:>8} {g['p99_ms']:>8}")
+    for workers, rate in results["throughput_cards_per_s"].items():
+        print(f"parse+render throughput x{workers}: {rate} cards/s")
+    print(f"max RSS: {results['max_rss_mib']} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50, help="renders per fixture and mode")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each throughput run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for the parallel throughput run")
+    parser.add_argument("--uplink-kbps", type=float, default=1000, help="uplink speed used for the upload_ms estimate")
+    parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE_PATH}")
+    parser.add_argument("--compare", action="store_true", help="fail if results regress against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed regression ratio for --compare")
+    args = parser.parse_args()
+
+    results = run(args.iterations, args.seconds, args.workers, args.uplink_kbps)
+    print_results(results)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline written to {BASELINE_PATH}")
+
+    if args.compare:
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
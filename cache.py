@@ -0,0 +1,193 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "2048"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "60"))
+PROFILE_CACHE_STALE = float(os.getenv("PROFILE_CACHE_STALE", "300"))
+CARD_CACHE_BYTES = int(os.getenv("CARD_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+
+class ProfileCache:
+    """Bounded LRU cache with a freshness TTL, a stale-while-revalidate window
+    and coalescing of concurrent fetches for the same key."""
+
+    def __init__(self, max_size=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL, stale=PROFILE_CACHE_STALE):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale = stale
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._inflight = {}            # key -> asyncio.Task
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+
+    def peek(self, key):
+        """Returns the cached value regardless of age, or None."""
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def put(self, key, value, age=0):
+        """Stores value as if it had been fetched `age` seconds ago."""
+        self._entries[key] = (time.monotonic() - age, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def age(self, key):
+        """Seconds since key was stored, or None if it isn't cached."""
+        entry = self._entries.get(key)
+        return time.monotonic() - entry[0] if entry else None
+
+    async def refresh(self, key, fetch):
+        """Fetches key now regardless of freshness (sharing any fetch already running)."""
+        return await asyncio.shield(self._start_fetch(key, fetch))
+
+    async def get(self, key, fetch):
+        """Returns the value for key, calling `await fetch()` only when needed."""
+        entry = self._entries.get(key)
+        if entry:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale:
+                # Serve the old card now, refresh in the background
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._start_fetch(key, fetch)
+                return value
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        return await asyncio.shield(self._start_fetch(key, fetch))
+
+    def _start_fetch(self, key, fetch):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_fetch(key, fetch))
+            task.add_done_callback(self._log_failure)
+            self._inflight[key] = task
+        return task
+
+    @staticmethod
+    def _log_failure(task):
+        # Background refreshes have nobody awaiting them, so surface errors here
+        if not task.cancelled() and task.exception() is not None:
+            print(f"DEBUG Cache fetch failed: {task.exception()}")
+
+    async def _run_fetch(self, key, fetch):
+        self.upstream_calls += 1
+        try:
+            value = await fetch()
+            self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        served = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "upstream_calls": self.upstream_calls,
+            "saved_calls": served - self.upstream_calls,
+            "hit_rate": (self.hits + self.stale_hits) / served if served else 0.0,
+        }
+
+
+class CardCache:
+    """LRU of encoded card PNGs, evicted by total size in bytes.
+
+    With a `store` (db.Database in shared mode) misses are looked up in, and
+    renders written to, a table every shard process can read."""
+
+    def __init__(self, max_bytes=CARD_CACHE_BYTES, store=None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> png bytes
+        self._inflight = {}            # key -> asyncio.Task
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_hits = 0
+
+    def put(self, key, png):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.total_bytes -= len(old)
+        if len(png) > self.max_bytes:
+            return
+        self._entries[key] = png
+        self.total_bytes += len(png)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+            self.evictions += 1
+
+    async def get(self, key, render):
+        """Returns the cached PNG for key, calling `await render()` on a miss."""
+        png = self._entries.get(key)
+        if png is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return png
+
+        self.misses += 1
+        return await asyncio.shield(self._start_render(key, render))
+
+    def prefetch(self, key, render):
+        """Renders key in the background unless it is cached or already rendering."""
+        if key not in self._entries:
+            self._start_render(key, render)
+
+    def _start_render(self, key, render):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_render(key, render))
+            task.add_done_callback(ProfileCache._log_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _run_render(self, key, render):
+        try:
+            png = await self.store.load_card(key) if self.store is not None else None
+            if png is not None:
+                self.shared_hits += 1
+            else:
+                png = await render()
+                if self.store is not None:
+                    self.store.save_card(key, png)
+            self.put(key, png)
+            return png
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "shared_hits": self.shared_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
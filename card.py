@@ -0,0 +1,351 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from PIL import Image, ImageDraw
+
+from assets import get_assets
+from cardspec import CARD_ENCODING, EXTRAS_MODES, SHORT_NAMES, STANDARD_MODES, RenderBusy
+from metrics import metrics
+from shards import SHARD_PROCESSES
+
+# Colors boosted in saturation/brightness to stand out
+RANK_COLORS = {
+    "bronze": (205, 127, 50), "silver": (192, 192, 192), "gold": (255, 215, 0),
+    "platinum": (0, 255, 255), "diamond": (0, 191, 255), "champion": (160, 32, 240),"grand": (255, 50, 50),
+    "grand_champion": (255, 50, 50), "supersonic_legend": (255, 255, 255), "unranked": (150, 150, 150)
+}
+
+TILE_COLOR = (27, 31, 39)
+TILE_POSITIONS = [(25, 110), (465, 110), (25, 345), (465, 345)]
+
+
+@lru_cache(maxsize=1)
+def get_card_template():
+    """Builds the player-independent layers of the card once per process."""
+    # 1. Canvas Setup
+    base = Image.new("RGBA", (900, 600), (29, 33, 42))
+    draw = ImageDraw.Draw(base)
+
+    # --- 3. UPDATED HEADER (Clipped at Dividers) ---
+    # First, draw the background bar for the whole header (Dark)
+    draw.rounded_rectangle([25, 20, 875, 85], radius=12, fill=TILE_COLOR)
+    
+    # Second, draw the COLOR fill only till the first slanted divider (approx 450px)
+    # We use a polygon to create the slanted edge at the end of the color bar
+
+    grad_start = (85, 200, 255,100)  # Vibrant Blue (with your requested transparency)
+    grad_end = (170, 100, 255,100)   # Vibrant Purple
+
+    # Define the coordinates for the slanted color bar
+    # Stopping at approximately 450px as before
+    poly_coords = [(25, 20), (450, 20), (420, 85), (25, 85)]
+    draw_slanted_gradient(draw, base, grad_start, grad_end, poly_coords)
+
+    # Smooth the far-left rounded corner with the starting blue
+    draw.pieslice([25, 20, 50, 85], 90, 270, fill=grad_start)
+
+    # Third, draw the Slanted Divider Design Elements
+    for i in range(3):
+        x_off = 480 + (i * 25)
+        draw.line([x_off, 20, x_off - 30, 85], fill=TILE_COLOR, width=12)
+
+    # Empty rank tiles
+    for x, y in TILE_POSITIONS:
+        draw.rounded_rectangle([x, y, x + 410, y + 215], radius=12, fill=TILE_COLOR)
+
+    return base
+
+
+def tier_color(tier):
+    return RANK_COLORS.get(tier.split()[0].lower(), (255, 255, 255))
+
+
+def warm_up():
+    """Loads assets and the card template (run at startup and in each worker)."""
+    get_assets()
+    get_card_template()
+
+
+# Pure rendering: plain data in, PNG bytes out. Nothing here touches discord,
+# so it can run inside worker processes.
+def render_rank_card(username, platform_name, display_name, profile, mode_type="standard"):
+    return encode_card(draw_rank_card(username, platform_name, display_name, profile, mode_type))
+
+
+def render_rank_card_timed(*args, **kwargs):
+    """render_rank_card that also returns (draw_seconds, encode_seconds) for metrics."""
+    start = time.perf_counter()
+    image = draw_rank_card(*args, **kwargs)
+    drawn = time.perf_counter()
+    png = encode_card(image)
+    return png, drawn - start, time.perf_counter() - drawn
+
+
+def encode_card(image, encoding=CARD_ENCODING):
+    if encoding.scale < 1:
+        size = (round(image.width * encoding.scale), round(image.height * encoding.scale))
+        image = image.resize(size, Image.BOX)
+
+    buffer = io.BytesIO()
+    if encoding.format == "webp":
+        # For lossless WebP, method and quality both trade encode time for size
+        effort = max(0, min(encoding.compress_level, 6))
+        image.save(buffer, format="WEBP", lossless=True, method=effort, quality=effort * 100 // 6)
+    else:
+        if encoding.palette_colors:
+            # Lossy: dithers the gradients and rank icons, see CARD_PALETTE_COLORS
+            image = image.quantize(colors=encoding.palette_colors, method=Image.Quantize.FASTOCTREE)
+        image.save(buffer, format="PNG", compress_level=encoding.compress_level)
+    return buffer.getvalue()
+
+
+def draw_rank_card(username, platform_name, display_name, profile, mode_type="standard"):
+    desired_modes = EXTRAS_MODES if mode_type == "extras" else STANDARD_MODES
+
+    # Only the dynamic content is painted per request, on a copy of the template
+    base = get_card_template().copy()
+    draw = ImageDraw.Draw(base)
+
+    reward_level = profile.reward_level
+
+    # 2. Fonts and icons come pre-loaded from the asset registry
+    assets = get_assets()
+    font_header = assets.fonts["header"]
+    font_mode_title = assets.fonts["mode_title"]
+    font_mode_reward = assets.fonts["mode_reward"]
+    font_rank_name = assets.fonts["rank_name"]
+    font_stats = assets.fonts["stats"]
+    font_mmr = assets.fonts["mmr"]
+
+    # --- 4. ASSETS & TEXT ---
+    p_img = assets.platform_icon(platform_name)
+    base.paste(p_img, (36, 35), mask=p_img)
+
+    draw.text((84, 34), f"{display_name.upper()}", font=font_header, fill=(255, 255, 255))
+    
+    reward_key = reward_level.split()[0].lower()
+    reward_color = RANK_COLORS.get(reward_key, (219, 90, 115))
+    draw.text((640, 38), f"{reward_level}", font=font_mode_reward, fill=reward_color)
+
+    # --- 5. RANK TILES ---
+    for count, mode_key in enumerate(desired_modes):
+        x, y = TILE_POSITIONS[count]
+        rank = profile.playlist(mode_key)
+
+        if rank is not None:
+            display_mode_name = SHORT_NAMES.get(mode_key, mode_key)
+            tier = rank.tier
+            text_color = tier_color(tier)
+
+            draw.text((x + 20, y + 15), display_mode_name, font=font_mode_title, fill=(100, 200, 255))
+            draw.text((x + 20, y + 53), tier, font=font_rank_name, fill=text_color)
+            draw.text((x + 20, y + 89), rank.division, font=font_mode_title, fill=(200, 200, 200))
+            draw.text((x + 20, y + 119), f"{rank.rating} MMR", font=font_mmr, fill=(160, 160, 160))
+            draw.text((x + 20, y + 164), f"{rank.matches} Matches", font=font_stats, fill=(140, 140, 140))
+
+            icon = assets.rank_icon(tier)
+            if icon is not None:
+                base.paste(icon, (x + 287, y + 24), mask=icon)
+
+            val = rank.streak
+            loss = rank.is_loss_streak
+            streak_text = f"{val} {'Loss' if loss else 'Win'}{'s' if val != 1 and rank.streak_type == 'win' else ''}"
+            streak_color = (255, 60, 60) if loss else (0, 255, 100)
+            draw.text((x + 314, y + 155), streak_text, font=font_stats, fill=streak_color)
+        else:
+            draw.text((x + 20, y + 20), mode_key, font=font_mode_title, fill=(100, 200, 255))
+            draw.text((x + 20, y + 55), "Unranked", font=font_rank_name, fill=(150, 150, 150))
+            # ADD THIS: Show unranked icon even if the mode isn't in the profile
+            u_icon = assets.unranked_icon
+            base.paste(u_icon, (x + 286, y + 25), mask=u_icon)
+
+    return base
+
+
+# --- LEADERBOARD ---
+LEADERBOARD_ROW_HEIGHT = 62
+LEADERBOARD_TOP = 105
+PODIUM_COLORS = [RANK_COLORS["gold"], RANK_COLORS["silver"], RANK_COLORS["bronze"]]
+
+
+def render_leaderboard(playlist, rows, footer):
+    return encode_card(draw_leaderboard(playlist, rows, footer))
+
+
+def fit_text(draw, text, font, max_width):
+    """Cuts text down with an ellipsis until it fits max_width."""
+    if draw.textlength(text, font=font) <= max_width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > max_width:
+        text = text[:-1]
+    return text + "…"
+
+
+def draw_leaderboard(playlist, rows, footer):
+    """One leaderboard page. rows are (position, username, platform, tier, division, rating)."""
+    height = LEADERBOARD_TOP + len(rows) * LEADERBOARD_ROW_HEIGHT + 45
+    base = Image.new("RGBA", (900, height), (29, 33, 42))
+    draw = ImageDraw.Draw(base)
+
+    assets = get_assets()
+    font_header = assets.fonts["header"]
+    font_name = assets.fonts["mode_title"]
+    font_stats = assets.fonts["stats"]
+    font_mmr = assets.fonts["mmr"]
+
+    # Same header bar as the rank card
+    draw.rounded_rectangle([25, 20, 875, 85], radius=12, fill=TILE_COLOR)
+    draw_slanted_gradient(draw, base, (85, 200, 255, 100), (170, 100, 255, 100), [(25, 20), (450, 20), (420, 85), (25, 85)])
+    draw.pieslice([25, 20, 50, 85], 90, 270, fill=(85, 200, 255, 100))
+    draw.text((45, 34), "LEADERBOARD", font=font_header, fill=(255, 255, 255))
+    draw.text((500, 38), SHORT_NAMES.get(playlist, playlist), font=assets.fonts["mode_reward"], fill=(100, 200, 255))
+
+    for i, (position, username, platform, tier, division, rating) in enumerate(rows):
+        y = LEADERBOARD_TOP + i * LEADERBOARD_ROW_HEIGHT
+        draw.rounded_rectangle([25, y, 875, y + 54], radius=10, fill=TILE_COLOR)
+
+        position_color = PODIUM_COLORS[position - 1] if position <= len(PODIUM_COLORS) else (140, 140, 140)
+        draw.text((40, y + 14), f"#{position}", font=font_name, fill=position_color)
+
+        p_img = assets.platform_icon(platform)
+        base.paste(p_img, (110, y + 8), mask=p_img)
+        draw.text((172, y + 14), fit_text(draw, username, font_name, 290), font=font_name, fill=(255, 255, 255))
+
+        icon = assets.rank_icon(tier, row=True)
+        if icon is not None:
+            base.paste(icon, (480, y + 4), mask=icon)
+        draw.text((535, y + 4), tier, font=font_stats, fill=tier_color(tier))
+        draw.text((535, y + 28), division, font=font_stats, fill=(140, 140, 140))
+
+        mmr_text = f"{rating} MMR"
+        draw.text((855 - draw.textlength(mmr_text, font=font_mmr), y + 15), mmr_text, font=font_mmr, fill=(200, 200, 200))
+
+    draw.text((30, height - 38), footer, font=font_stats, fill=(140, 140, 140))
+    return base
+
+
+def draw_slanted_gradient(draw, base_img, start_color, end_color, polygon_coords):
+    """Draws a linear horizontal gradient within a slanted polygon."""
+    min_x = min(p[0] for p in polygon_coords)
+    min_y = min(p[1] for p in polygon_coords)
+    gradient, mask = _slanted_gradient_patch(tuple(start_color), tuple(end_color), tuple(map(tuple, polygon_coords)))
+
+    # Paste the gradient onto the base image using the slanted mask
+    base_img.paste(gradient, (min_x, min_y), mask=mask)
+
+
+@lru_cache(maxsize=32)
+def _slanted_gradient_patch(start_color, end_color, polygon_coords):
+    """Builds the gradient and mask for just the polygon's bounding box."""
+    # Find the bounds of the polygon
+    min_x = min(p[0] for p in polygon_coords)
+    max_x = max(p[0] for p in polygon_coords)
+    min_y = min(p[1] for p in polygon_coords)
+    max_y = max(p[1] for p in polygon_coords)
+    width, height = max_x - min_x + 1, max_y - min_y + 1
+
+    # Create a mask for the slanted shape. It is drawn at its real position
+    # (the rasterizer is not shift-invariant on every edge) and then cropped.
+    mask = Image.new('L', (max_x + 1, max_y + 1), 0)
+    ImageDraw.Draw(mask).polygon(polygon_coords, fill=255)
+    mask = mask.crop((min_x, min_y, max_x + 1, max_y + 1))
+
+    # One row of colors, stretched down to the box height. A plain loop is
+    # fine here: it runs once per polygon per process (under 1ms for the
+    # header) and Image.linear_gradient's 256 steps would not reproduce the
+    # per-column rounding (tests/test_gradient.py checks the pixels).
+    a = start_color[3] if len(start_color) > 3 else 255
+    row = bytearray()
+    for x in range(width):
+        # Calculate the color at this X position
+        mix = x / (width - 1) if width > 1 else 0
+        row += bytes((
+            int(start_color[0] + (end_color[0] - start_color[0]) * mix),
+            int(start_color[1] + (end_color[1] - start_color[1]) * mix),
+            int(start_color[2] + (end_color[2] - start_color[2]) * mix),
+            a,
+        ))
+    gradient = Image.frombytes('RGBA', (width, 1), bytes(row)).resize((width, height), Image.NEAREST)
+
+    return gradient, mask
+
+
+# --- RENDER POOL ---
+RENDER_EXECUTOR = os.getenv("RENDER_EXECUTOR", "process")  # "process" or "thread"
+# Shard processes each run a pool, so they split the cores between them
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(max(1, (os.cpu_count() or 2) // SHARD_PROCESSES))))
+RENDER_QUEUE_SIZE = int(os.getenv("RENDER_QUEUE_SIZE", "64"))
+
+
+class RenderPool:
+    """Runs card and leaderboard renders off the event loop with a bounded queue."""
+
+    def __init__(self, executor=RENDER_EXECUTOR, workers=RENDER_WORKERS, queue_size=RENDER_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.kind = executor
+        self.executor = None
+        if executor == "process":
+            try:
+                # spawn keeps the workers free of the bot's loop, sockets and threads
+                self.executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=warm_up,
+                )
+            except (OSError, NotImplementedError, ImportError) as e:
+                print(f"⚠️ Process pool unavailable ({e}), falling back to threads")
+        if self.executor is None:
+            self.kind = "thread"
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+
+        # Only `workers` renders run at once; up to `queue_size` more may wait
+        self._running = asyncio.Semaphore(workers)
+        self.waiting = 0
+
+    async def start(self):
+        """Loads assets here and in every worker, so the first card doesn't pay for it."""
+        loop = asyncio.get_running_loop()
+        # Raises on missing fonts/icons before any command can hit them
+        await loop.run_in_executor(None, warm_up)
+        # One job per worker makes the pool spawn all of them now
+        await asyncio.gather(*[loop.run_in_executor(self.executor, warm_up) for _ in range(self.workers)])
+
+    async def render(self, *args, **kwargs):
+        """Renders a card in the pool and returns the PNG bytes."""
+        png, draw_s, encode_s = await self._run(partial(render_rank_card_timed, *args, **kwargs))
+        metrics.observe("render_draw", draw_s)
+        metrics.observe("render_encode", encode_s)
+        return png
+
+    async def render_leaderboard(self, *args):
+        """Renders a leaderboard page in the pool and returns the PNG bytes."""
+        return await self._run(partial(render_leaderboard, *args))
+
+    async def _run(self, job):
+        if self.waiting >= self.queue_size:
+            raise RenderBusy(f"{self.waiting} renders already queued")
+
+        self.waiting += 1
+        try:
+            with metrics.span("render_wait"):
+                await self._running.acquire()
+        finally:
+            self.waiting -= 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, job)
+        finally:
+            self._running.release()
+
+    def stats(self):
+        return {"workers": self.workers, "waiting": self.waiting, "queue_size": self.queue_size}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
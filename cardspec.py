@@ -0,0 +1,57 @@
+import hashlib
+import os
+from collections import namedtuple
+
+# Card settings and helpers that don't need Pillow, so the bot can import
+# them at startup and leave the renderer to load in the background.
+
+STANDARD_MODES = ['Ranked Duel 1v1', 'Ranked Doubles 2v2', 'Ranked Standard 3v3', 'Tournament Matches']
+EXTRAS_MODES = ['Rumble', 'Dropshot', 'Hoops', 'Heatseeker']
+
+# NEW MAPPING: Shortens all main mode names for the UI
+SHORT_NAMES = {
+    'Ranked Duel 1v1': 'Ranked 1v1',
+    'Ranked Doubles 2v2': 'Ranked 2v2',
+    'Ranked Standard 3v3': 'Ranked 3v3',
+    'Tournament Matches': 'Tournament Rank'
+}
+
+# Output stage; bench/run.py reports encode time and size for each option
+CARD_FORMAT = os.getenv("CARD_FORMAT", "png").lower()               # "png" or "webp" (lossless)
+# Palette mode is lossy and opt-in: at 256 colours nearly every pixel
+# shifts a little (44-48 dB PSNR on the bench fixtures, up to 61 levels
+# on rank icons) in exchange for a much smaller file
+CARD_PALETTE_COLORS = int(os.getenv("CARD_PALETTE_COLORS", "0"))    # PNG only, 0 keeps full RGBA
+CARD_COMPRESS_LEVEL = int(os.getenv("CARD_COMPRESS_LEVEL", "6"))    # PNG zlib level 0-9, WebP effort 0-6
+CARD_SCALE = float(os.getenv("CARD_SCALE", "1"))                    # below 1 sends a reduced-resolution preview
+
+
+class CardEncoding(namedtuple("CardEncoding", "format palette_colors compress_level scale")):
+    """How a drawn card is turned into bytes for upload."""
+    __slots__ = ()
+
+    @property
+    def extension(self):
+        return "webp" if self.format == "webp" else "png"
+
+
+CARD_ENCODING = CardEncoding(CARD_FORMAT, CARD_PALETTE_COLORS, CARD_COMPRESS_LEVEL, CARD_SCALE)
+
+
+def card_filename(stem="rank_card", encoding=CARD_ENCODING):
+    return f"{stem}.{encoding.extension}"
+
+
+def card_cache_key(platform_name, display_name, profile, mode_type="standard", encoding=CARD_ENCODING):
+    """Content hash of everything that ends up on a card in the given mode.
+
+    Includes the encoding: shared cards outlive a restart, and bytes from an
+    earlier CARD_FORMAT or CARD_SCALE must not be served under the new one."""
+    desired_modes = EXTRAS_MODES if mode_type == "extras" else STANDARD_MODES
+    relevant = [profile.playlist(mode) for mode in desired_modes]
+    payload = repr((platform_name, display_name, mode_type, profile.reward_level, relevant, tuple(encoding)))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class RenderBusy(Exception):
+    """Raised when the render queue is full and the caller should back off."""
@@ -0,0 +1,458 @@
+import asyncio
+import os
+import sqlite3
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from models import PlaylistRank, Profile
+
+# How long ranklink writes wait to be grouped into one transaction
+WRITE_BATCH_DELAY = float(os.getenv("DB_WRITE_BATCH_DELAY", "0.2"))
+
+# Snapshot retention: full history for a week, one row per day after that,
+# nothing past the retention window (except each player's latest ranks)
+SNAPSHOT_FULL_DAYS = int(os.getenv("SNAPSHOT_FULL_DAYS", "7"))
+SNAPSHOT_RETENTION_DAYS = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "90"))
+SNAPSHOT_PRUNE_INTERVAL = 3600
+
+# Rendered cards shared between shard processes (SHARED_STATE only)
+SHARED_CARD_TTL = int(os.getenv("SHARED_CARD_TTL", "3600"))
+
+
+def get_db_path():
+    if os.path.exists("/data"):
+        return "/data/bot_data.db"
+
+    # This creates an absolute path to your current folder
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot_data.db")
+
+
+# Initialize the database and table
+def init_db(conn):
+    cursor = conn.cursor()
+    # Create table if it doesn't exist
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            discord_id INTEGER PRIMARY KEY,
+            rl_username TEXT,
+            rl_platform TEXT
+        )
+    """)
+    # Small key/value store for bot state, e.g. the last synced command tree hash
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+    # Cards rendered by any shard process, so the others can reuse them
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS card_cache (
+            key TEXT PRIMARY KEY,
+            stored_at INTEGER NOT NULL,
+            png BLOB NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS card_cache_stored_at ON card_cache (stored_at)")
+    # The tracker.gg token bucket, when several processes share one budget
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS upstream_budget (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            refilled_at REAL NOT NULL,
+            rate REAL NOT NULL,
+            blocked_until REAL NOT NULL
+        )
+    """)
+    # Which guilds a Discord user has been seen in, for per-server leaderboards
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS guild_members (
+            guild_id INTEGER NOT NULL,
+            discord_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, discord_id)
+        ) WITHOUT ROWID
+    """)
+    # Last command time per Discord user, so the refresh scheduler in the
+    # primary shard process sees users active in the other processes
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_activity (
+            discord_id INTEGER PRIMARY KEY,
+            last_active INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    # One compact row per playlist per fetch; the overview reward level is
+    # stored as playlist 'overview' with the reward name in `tier`
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rank_snapshots (
+            platform TEXT NOT NULL,
+            username TEXT NOT NULL,
+            playlist TEXT NOT NULL,
+            fetched_at INTEGER NOT NULL,
+            tier TEXT,
+            division TEXT,
+            rating INTEGER,
+            matches INTEGER,
+            streak INTEGER,
+            streak_loss INTEGER,
+            PRIMARY KEY (platform, username, playlist, fetched_at)
+        ) WITHOUT ROWID
+    """)
+    conn.commit()
+
+
+def profile_to_rows(profile):
+    """Flattens a Profile into (playlist, tier, division, rating, matches, streak, streak_loss) rows."""
+    rows = [("overview", profile.reward_level, None, None, None, None, None)]
+    for p in profile.playlists:
+        rows.append((p.playlist, p.tier, p.division, p.rating, p.matches, p.streak, 1 if p.is_loss_streak else 0))
+    return rows
+
+
+def rows_to_profile(rows, fetched_at):
+    """Rebuilds a Profile from snapshot rows."""
+    reward_level = "Unranked"
+    playlists = []
+    for playlist, tier, division, rating, matches, streak, streak_loss in rows:
+        if playlist == "overview":
+            reward_level = tier
+        else:
+            playlists.append(PlaylistRank(playlist, tier, division, rating, matches, streak, 'loss' if streak_loss else 'win'))
+    return Profile(reward_level, tuple(playlists), fetched_at, True)
+
+
+class Database:
+    """Single SQLite connection used from one worker thread, plus in-memory
+    discord_id -> (rl_username, rl_platform) and guild_id -> {discord_id} indexes."""
+
+    def __init__(self, path=None, shared=False):
+        self.path = path or get_db_path()
+        # Other processes write to the same file: don't trust the in-memory link index alone
+        self.shared = shared
+        # sqlite3 connections are not thread-safe, so every query runs on this one thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = None
+        self.links = {}
+        self.guild_members = defaultdict(set)
+
+        self._pending_links = {}  # discord_id -> (rl_username, rl_platform)
+        self._pending_waiters = []
+        self._flush_task = None
+        self._background = set()
+        self._last_prune = 0
+        self._last_card_prune = 0
+
+    async def run(self, fn, *args):
+        """Runs fn(conn, *args) on the database thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, self._conn, *args)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._conn = await loop.run_in_executor(self._executor, self._open)
+        self.links = await self.run(self._load_links)
+        self.guild_members = await self.run(self._load_guild_members)
+        print(f"✅ Database initialized at: {self.path} ({len(self.links)} linked users)")
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets readers run alongside the writer; NORMAL skips an fsync per commit
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        init_db(conn)
+        return conn
+
+    @staticmethod
+    def _load_links(conn):
+        rows = conn.execute("SELECT discord_id, rl_username, rl_platform FROM users").fetchall()
+        return {discord_id: (username, platform) for discord_id, username, platform in rows}
+
+    @staticmethod
+    def _load_guild_members(conn):
+        members = defaultdict(set)
+        for guild_id, discord_id in conn.execute("SELECT guild_id, discord_id FROM guild_members"):
+            members[guild_id].add(discord_id)
+        return members
+
+    # --- USERS ---
+    def get_link(self, discord_id):
+        """Returns (rl_username, rl_platform) for a Discord user, or None. No disk access."""
+        return self.links.get(discord_id)
+
+    async def find_link(self, discord_id):
+        """get_link, but in shared mode reads the row so links made by other processes show up."""
+        if not self.shared:
+            return self.get_link(discord_id)
+        row = await self.run(lambda conn: conn.execute(
+            "SELECT rl_username, rl_platform FROM users WHERE discord_id = ?", (discord_id,)
+        ).fetchone())
+        if row is None:
+            self.links.pop(discord_id, None)
+            return None
+        self.links[discord_id] = tuple(row)
+        return self.links[discord_id]
+
+    async def refresh_links(self):
+        """Reloads the link index in shared mode, picking up other processes' writes."""
+        if self.shared:
+            self.links = await self.run(self._load_links)
+
+    async def link_user(self, discord_id, rl_username, rl_platform):
+        """Queues the link for the next batched write and waits until it is committed."""
+        self._pending_links[discord_id] = (rl_username, rl_platform)
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending_waiters.append(waiter)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_delay())
+        await waiter
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(WRITE_BATCH_DELAY)
+        self._flush_task = None
+        await self._flush_links()
+
+    async def _flush_links(self):
+        batch, self._pending_links = self._pending_links, {}
+        waiters, self._pending_waiters = self._pending_waiters, []
+        if not batch:
+            return
+        try:
+            await self.run(self._write_links, list(batch.items()))
+        except Exception as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+
+        self.links.update(batch)
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @staticmethod
+    def _write_links(conn, items):
+        with conn:
+            # INSERT OR REPLACE keeps the DB clean by updating existing users
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (discord_id, rl_username, rl_platform) VALUES (?, ?, ?)",
+                [(discord_id, username, platform) for discord_id, (username, platform) in items],
+            )
+
+    # --- SETTINGS ---
+    async def get_setting(self, key):
+        row = await self.run(lambda conn: conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone())
+        return row[0] if row else None
+
+    async def set_setting(self, key, value):
+        await self.run(self._write_setting, key, value)
+
+    @staticmethod
+    def _write_setting(conn, key, value):
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    # --- SHARED CARD CACHE ---
+    async def load_card(self, key):
+        row = await self.run(lambda conn: conn.execute(
+            "SELECT png FROM card_cache WHERE key = ? AND stored_at > ?", (key, int(time.time()) - SHARED_CARD_TTL)
+        ).fetchone())
+        return row[0] if row else None
+
+    def save_card(self, key, png):
+        """Stores a rendered card in the background, expiring old ones now and then."""
+        prune = time.time() - self._last_card_prune > 60
+        if prune:
+            self._last_card_prune = time.time()
+        self.run_in_background(self._write_card, key, png, prune)
+
+    @staticmethod
+    def _write_card(conn, key, png, prune):
+        now = int(time.time())
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO card_cache (key, stored_at, png) VALUES (?, ?, ?)", (key, now, png))
+            if prune:
+                conn.execute("DELETE FROM card_cache WHERE stored_at < ?", (now - SHARED_CARD_TTL,))
+
+    # --- GUILD MEMBERS ---
+    def remember_members(self, guild_id, discord_ids):
+        """Records that Discord users are in a guild. Only new pairs touch the disk."""
+        if guild_id is None:
+            return
+        new = [d for d in discord_ids if d not in self.guild_members[guild_id]]
+        if new:
+            self.guild_members[guild_id].update(new)
+            self.run_in_background(self._write_guild_members, [(guild_id, d) for d in new])
+
+    def guild_links(self, guild_id):
+        """Returns {discord_id: (rl_username, rl_platform)} for linked users seen in a guild."""
+        return {d: self.links[d] for d in self.guild_members.get(guild_id, ()) if d in self.links}
+
+    @staticmethod
+    def _write_guild_members(conn, pairs):
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO guild_members (guild_id, discord_id) VALUES (?, ?)", pairs)
+
+    # --- USER ACTIVITY (SHARED_STATE) ---
+    def record_activity(self, discord_id):
+        """Stores when a Discord user last ran a command, in the background."""
+        self.run_in_background(self._write_activity, discord_id, int(time.time()))
+
+    @staticmethod
+    def _write_activity(conn, discord_id, last_active):
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO user_activity (discord_id, last_active) VALUES (?, ?)", (discord_id, last_active))
+
+    async def recent_activity(self, since):
+        """Returns {discord_id: last_active} for users active after `since` (a time.time())."""
+        rows = await self.run(lambda conn: conn.execute(
+            "SELECT discord_id, last_active FROM user_activity WHERE last_active >= ?", (since,)
+        ).fetchall())
+        return dict(rows)
+
+    # --- RANK SNAPSHOTS ---
+    def save_snapshot(self, platform, username, profile):
+        """Stores a successful fetch in the background."""
+        self.run_in_background(self._write_snapshot, platform, username.lower(), profile_to_rows(profile))
+
+        if time.time() - self._last_prune > SNAPSHOT_PRUNE_INTERVAL:
+            self._last_prune = time.time()
+            self.run_in_background(self._prune_snapshots)
+
+    def run_in_background(self, fn, *args):
+        """Runs fn(conn, *args) on the database thread without waiting for it."""
+        task = asyncio.create_task(self.run(fn, *args))
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"DEBUG Background write failed: {task.exception()}")
+
+    @staticmethod
+    def _latest_rows(conn, platform, username):
+        return conn.execute("""
+            SELECT playlist, fetched_at, tier, division, rating, matches, streak, streak_loss
+            FROM rank_snapshots s
+            WHERE platform = ? AND username = ? AND fetched_at = (
+                SELECT MAX(fetched_at) FROM rank_snapshots
+                WHERE platform = s.platform AND username = s.username AND playlist = s.playlist
+            )
+        """, (platform, username)).fetchall()
+
+    @classmethod
+    def _write_snapshot(cls, conn, platform, username, rows):
+        now = int(time.time())
+        latest = {r[0]: r for r in cls._latest_rows(conn, platform, username)}
+        with conn:
+            for row in rows:
+                previous = latest.get(row[0])
+                if previous is not None and tuple(previous[2:]) == tuple(row[1:]):
+                    # Unchanged since last time: just move the latest row forward
+                    conn.execute(
+                        "UPDATE rank_snapshots SET fetched_at = ? WHERE platform = ? AND username = ? AND playlist = ? AND fetched_at = ?",
+                        (now, platform, username, row[0], previous[1]),
+                    )
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO rank_snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (platform, username, row[0], now, *row[1:]),
+                    )
+
+    async def latest_snapshot(self, platform, username):
+        """Returns the newest stored ranks as a Profile (from_snapshot=True), or None."""
+        rows = await self.run(self._latest_rows, platform, username.lower())
+        if not rows:
+            return None
+        fetched_at = max(r[1] for r in rows)
+        return rows_to_profile([(r[0], *r[2:]) for r in rows], fetched_at)
+
+    @staticmethod
+    def _rows_at(conn, platform, username, seen_at):
+        # Unchanged rows get their fetched_at moved forward, so the ranks seen
+        # at `seen_at` are the oldest row per playlist that is not older than it
+        return conn.execute("""
+            SELECT playlist, fetched_at, tier, division, rating, matches, streak, streak_loss
+            FROM rank_snapshots s
+            WHERE platform = ? AND username = ? AND fetched_at = (
+                SELECT MIN(fetched_at) FROM rank_snapshots
+                WHERE platform = s.platform AND username = s.username AND playlist = s.playlist AND fetched_at >= ?
+            )
+        """, (platform, username, seen_at)).fetchall()
+
+    async def snapshot_at(self, platform, username, seen_at):
+        """Returns the ranks as they were at `seen_at` (a Profile's fetched_at), or None once pruned.
+
+        Rows don't keep their first-seen time, so a playlist that first
+        appeared after `seen_at` is included with its earliest values."""
+        rows = await self.run(self._rows_at, platform, username.lower(), seen_at)
+        if not rows:
+            return None
+        return rows_to_profile([(r[0], *r[2:]) for r in rows], seen_at)
+
+    async def latest_snapshots(self, players):
+        """Bulk latest_snapshot for [(platform, username)]: {(platform, username.lower()): Profile}."""
+        keys = list({(platform, username.lower()) for platform, username in players})
+        rows = await self.run(self._latest_rows_many, keys)
+        grouped = defaultdict(list)
+        for platform, username, playlist, fetched_at, *rest in rows:
+            grouped[(platform, username)].append((playlist, fetched_at, *rest))
+        return {
+            key: rows_to_profile([(r[0], *r[2:]) for r in player_rows], max(r[1] for r in player_rows))
+            for key, player_rows in grouped.items()
+        }
+
+    @staticmethod
+    def _latest_rows_many(conn, keys):
+        rows = []
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 400):
+            chunk = keys[i:i + 400]
+            placeholders = ", ".join(["(?, ?)"] * len(chunk))
+            rows += conn.execute(f"""
+                WITH wanted(platform, username) AS (VALUES {placeholders})
+                SELECT s.platform, s.username, s.playlist, s.fetched_at, s.tier, s.division, s.rating, s.matches, s.streak, s.streak_loss
+                FROM wanted JOIN rank_snapshots s ON s.platform = wanted.platform AND s.username = wanted.username
+                WHERE s.fetched_at = (
+                    SELECT MAX(fetched_at) FROM rank_snapshots
+                    WHERE platform = s.platform AND username = s.username AND playlist = s.playlist
+                )
+            """, [value for key in chunk for value in key]).fetchall()
+        return rows
+
+    @staticmethod
+    def _prune_snapshots(conn):
+        now = int(time.time())
+        downsample_before = now - SNAPSHOT_FULL_DAYS * 86400
+        drop_before = now - SNAPSHOT_RETENTION_DAYS * 86400
+        with conn:
+            # Past the full-history window keep only the last row of each day
+            conn.execute("""
+                DELETE FROM rank_snapshots AS s
+                WHERE fetched_at < ? AND EXISTS (
+                    SELECT 1 FROM rank_snapshots
+                    WHERE platform = s.platform AND username = s.username AND playlist = s.playlist
+                      AND fetched_at / 86400 = s.fetched_at / 86400 AND fetched_at > s.fetched_at
+                )
+            """, (downsample_before,))
+            # Past retention drop everything but each player's latest row
+            conn.execute("""
+                DELETE FROM rank_snapshots AS s
+                WHERE fetched_at < ? AND EXISTS (
+                    SELECT 1 FROM rank_snapshots
+                    WHERE platform = s.platform AND username = s.username AND playlist = s.playlist
+                      AND fetched_at > s.fetched_at
+                )
+            """, (drop_before,))
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._flush_links()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._conn is not None:
+            await self.run(lambda conn: conn.close())
+        self._executor.shutdown(wait=True)
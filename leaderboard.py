@@ -0,0 +1,199 @@
+import asyncio
+import math
+import os
+import time
+from collections import namedtuple
+
+import discord
+from curl_cffi.requests import RequestsError
+
+from cache import ProfileCache
+from cardspec import EXTRAS_MODES, STANDARD_MODES
+from metrics import metrics
+from ratelimit import RateLimited
+from tracker import TrackerError
+
+LEADERBOARD_PLAYLISTS = STANDARD_MODES + EXTRAS_MODES
+LEADERBOARD_PAGE_SIZE = int(os.getenv("LEADERBOARD_PAGE_SIZE", "10"))
+LEADERBOARD_CONCURRENCY = int(os.getenv("LEADERBOARD_CONCURRENCY", "4"))
+LEADERBOARD_FETCH_SECONDS = float(os.getenv("LEADERBOARD_FETCH_SECONDS", "8"))  # upstream time per build
+LEADERBOARD_TTL = float(os.getenv("LEADERBOARD_TTL", "60"))                       # page flips reuse a build
+LEADERBOARD_DISCOVERY_SECONDS = float(os.getenv("LEADERBOARD_DISCOVERY_SECONDS", "2"))  # member lookup per build
+MEMBER_QUERY_CHUNK = 100  # Discord answers at most 100 user_ids per member query
+
+
+class Standing(namedtuple("Standing", "username platform tier division rating")):
+    __slots__ = ()
+
+
+class Board(namedtuple("Board", "playlist standings players loading built_at")):
+    """A sorted leaderboard for one guild and playlist."""
+    __slots__ = ()
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(len(self.standings) / LEADERBOARD_PAGE_SIZE))
+
+    def page_rows(self, page):
+        """(position, username, platform, tier, division, rating) rows for card.draw_leaderboard."""
+        start = page * LEADERBOARD_PAGE_SIZE
+        return [
+            (start + i + 1, *standing)
+            for i, standing in enumerate(self.standings[start:start + LEADERBOARD_PAGE_SIZE])
+        ]
+
+    def footer(self, page):
+        text = f"Page {page + 1}/{self.pages} · {len(self.standings)} players"
+        if self.loading:
+            text += f" · {self.loading} still loading"
+        return text
+
+
+def rank_players(players, profiles, playlist):
+    """Sorts the players that have a profile by MMR in `playlist`, unranked last."""
+    standings = []
+    for platform, username in players:
+        profile = profiles.get((platform, username.lower()))
+        if profile is None:
+            continue
+        rank = profile.playlist(playlist)
+        if rank is None:
+            standings.append(Standing(username, platform, "Unranked", "", 0))
+        else:
+            standings.append(Standing(username, platform, rank.tier, rank.division, rank.rating))
+    standings.sort(key=lambda s: (-s.rating, s.username.lower()))
+    return standings
+
+
+class Leaderboards:
+    """Builds per-guild leaderboards from cached profiles, stored snapshots and
+    a bounded number of fresh fetches."""
+
+    def __init__(self, tracker, db, concurrency=LEADERBOARD_CONCURRENCY, fetch_seconds=LEADERBOARD_FETCH_SECONDS,
+                 discovery_seconds=LEADERBOARD_DISCOVERY_SECONDS):
+        self.tracker = tracker
+        self.db = db
+        self.concurrency = concurrency
+        self.fetch_seconds = fetch_seconds
+        self.discovery_seconds = discovery_seconds
+        # Reuses the profile cache for built boards: TTL plus build coalescing
+        self.boards = ProfileCache(max_size=256, ttl=LEADERBOARD_TTL, stale=0)
+        self._discovered = set()  # guild ids whose existing links were checked this run
+        self._discovering = {}    # guild id -> running discovery task
+
+        self.builds = 0
+        self.fetched = 0
+
+    async def get(self, guild, playlist):
+        return await self.boards.get((guild.id, playlist), lambda: self.build(guild, playlist))
+
+    async def discover_members(self, guild):
+        """Finds linked users that are in the guild but never used a command there.
+
+        Runs once per guild per process; later joins are picked up as people use commands.
+        Waits at most `discovery_seconds`: with many links the gateway's send limit makes
+        this slow, so it carries on in the background and the board shows who is known."""
+        if guild.id in self._discovered:
+            return
+        task = self._discovering.get(guild.id)
+        if task is None:
+            task = asyncio.create_task(self._discover(guild))
+            task.add_done_callback(self._log_failure)
+            self._discovering[guild.id] = task
+        await asyncio.wait([task], timeout=self.discovery_seconds)
+
+    async def _discover(self, guild):
+        try:
+            known = self.db.guild_members.get(guild.id, set())
+            unknown = [d for d in self.db.links if d not in known]
+            found = 0
+            for i in range(0, len(unknown), MEMBER_QUERY_CHUNK):
+                chunk = unknown[i:i + MEMBER_QUERY_CHUNK]
+                try:
+                    members = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False)
+                except (asyncio.TimeoutError, discord.HTTPException) as e:
+                    # Try again on the next build
+                    print(f"⚠️ Member lookup for guild {guild.id} stopped: {e!r}")
+                    return
+                except discord.ClientException as e:
+                    # e.g. the members intent is off: it won't work until a restart
+                    print(f"⚠️ Member lookup for guild {guild.id} unavailable: {e}")
+                    break
+                self.db.remember_members(guild.id, [m.id for m in members])
+                found += len(members)
+            self._discovered.add(guild.id)
+            if found:
+                # Boards built while this ran are missing these players
+                for playlist in LEADERBOARD_PLAYLISTS:
+                    self.boards.invalidate((guild.id, playlist))
+        finally:
+            self._discovering.pop(guild.id, None)
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"DEBUG Member lookup failed: {task.exception()}")
+
+    async def build(self, guild, playlist):
+        with metrics.span("leaderboard_build"):
+            await self.db.refresh_links()
+            await self.discover_members(guild)
+            # Two Discord users may link the same account
+            players = list({(p, u.lower()): (p, u) for u, p in self.db.guild_links(guild.id).values()}.values())
+            profiles, loading = await self.load_profiles(players)
+            self.builds += 1
+            return Board(playlist, rank_players(players, profiles, playlist), len(players), loading, int(time.time()))
+
+    async def load_profiles(self, players):
+        """Returns ({(platform, username.lower()): Profile}, players still missing).
+
+        Cached profiles are used whatever their age (the refresh scheduler keeps
+        linked users warm), then stored snapshots. Only the rest is fetched, at
+        most `concurrency` at once and for at most `fetch_seconds`."""
+        profiles = {}
+        missing = []
+        for platform, username in players:
+            profile = self.tracker.cache.peek((platform, username.lower()))
+            if profile is not None:
+                profiles[(platform, username.lower())] = profile
+            else:
+                missing.append((platform, username))
+
+        if missing and self.tracker.store is not None:
+            snapshots = await self.tracker.store.latest_snapshots(missing)
+            profiles.update(snapshots)
+            # Never-seen players first, then ones we only have a snapshot for
+            missing.sort(key=lambda player: (player[0], player[1].lower()) in snapshots)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stopped = False
+
+        async def fetch(platform, username):
+            nonlocal stopped
+            async with semaphore:
+                if stopped:
+                    return
+                try:
+                    profiles[(platform, username.lower())] = await self.tracker.get_profile(platform, username)
+                    self.fetched += 1
+                except RateLimited:
+                    # No upstream budget left; whatever we have will do
+                    stopped = True
+                except TrackerError as e:
+                    if e.status_code in (403, 429):
+                        stopped = True
+                except RequestsError:
+                    pass
+
+        tasks = [asyncio.create_task(fetch(platform, username)) for platform, username in missing]
+        if tasks:
+            # Fetches still running carry on in the profile cache for the next build
+            _, pending = await asyncio.wait(tasks, timeout=self.fetch_seconds)
+            for task in pending:
+                task.cancel()
+
+        loading = sum(1 for platform, username in players if (platform, username.lower()) not in profiles)
+        return profiles, loading
+
+    def stats(self):
+        return {"builds": self.builds, "fetched": self.fetched, "cached_boards": self.boards.stats()["size"]}
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))  # samples kept per histogram
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))          # 0 disables the HTTP endpoint
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Metrics:
+    """Rolling latency histograms, counters and gauges for the whole bot."""
+
+    def __init__(self, sample_rate=METRICS_SAMPLE_RATE, window=METRICS_WINDOW):
+        self.sample_rate = sample_rate
+        self.histograms = defaultdict(lambda: deque(maxlen=window))  # name -> seconds
+        self.counters = defaultdict(int)                             # (name, label) -> count
+        self.gauges = {}                                             # name -> fn() -> {field: number}
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def observe(self, name, seconds):
+        self.histograms[name].append(seconds)
+
+    @contextmanager
+    def span(self, name):
+        """Times the enclosed block into the `name` histogram (when sampled)."""
+        if not self.sampled():
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histograms[name].append(time.perf_counter() - start)
+
+    def count(self, name, label="", n=1):
+        self.counters[(name, str(label))] += n
+
+    def gauge(self, name, fn):
+        """Registers fn, called on read, returning a dict of numeric fields."""
+        self.gauges[name] = fn
+
+    def quantiles(self, name):
+        samples = sorted(self.histograms[name])
+        if not samples:
+            return {}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+    def _gauge_values(self):
+        values = {}
+        for name, fn in self.gauges.items():
+            try:
+                fields = fn()
+            except Exception:
+                continue
+            for field, value in fields.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[f"{name}_{field}"] = value
+        return values
+
+    def render_text(self):
+        """Human-readable summary, used by /botstats."""
+        lines = ["Latency (ms)      p50     p95     p99      n"]
+        for name in sorted(self.histograms):
+            q = self.quantiles(name)
+            if q:
+                lines.append(
+                    f"{name:<15} {q[0.5] * 1000:>7.1f} {q[0.95] * 1000:>7.1f} {q[0.99] * 1000:>7.1f} {len(self.histograms[name]):>6}"
+                )
+        if self.counters:
+            lines.append("")
+            lines.append("Counters")
+            for (name, label), value in sorted(self.counters.items()):
+                lines.append(f"{name}{f'[{label}]' if label else ''}: {value}")
+        gauges = self._gauge_values()
+        if gauges:
+            lines.append("")
+            lines.append("Gauges")
+            for name, value in sorted(gauges.items()):
+                lines.append(f"{name}: {round(value, 3)}")
+        return "\n".join(lines)
+
+    def render_prometheus(self):
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP rlbot_phase_seconds Rolling latency quantiles per phase",
+            "# TYPE rlbot_phase_seconds summary",
+        ]
+        for name in sorted(self.histograms):
+            samples = self.histograms[name]
+            for q, value in self.quantiles(name).items():
+                lines.append(f'rlbot_phase_seconds{{phase="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'rlbot_phase_seconds_sum{{phase="{name}"}} {sum(samples):.6f}')
+            lines.append(f'rlbot_phase_seconds_count{{phase="{name}"}} {len(samples)}')
+
+        lines.append("# TYPE rlbot_events_total counter")
+        for (name, label), value in sorted(self.counters.items()):
+            lines.append(f'rlbot_events_total{{name="{name}",label="{label}"}} {value}')
+
+        lines.append("# TYPE rlbot_gauge gauge")
+        for name, value in sorted(self._gauge_values().items()):
+            lines.append(f'rlbot_gauge{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host=METRICS_HOST, port=METRICS_PORT):
+        """Serves /metrics (Prometheus) and / (text) on a local port."""
+        async def handle(reader, writer):
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+                parts = request_line.decode(errors="replace").split()
+                path = parts[1] if len(parts) > 1 else "/"
+                body = self.render_prometheus() if path.startswith("/metrics") else self.render_text() + "\n"
+                payload = body.encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    + f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+            except (asyncio.TimeoutError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        print(f"✅ Metrics endpoint on http://{host}:{port}/metrics")
+        return server
+
+
+# One registry for the whole process
+metrics = Metrics()
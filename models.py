@@ -0,0 +1,78 @@
+import json
+import time
+from collections import namedtuple
+
+_decoder = json.JSONDecoder()
+
+
+class PlaylistRank(namedtuple("PlaylistRank", "playlist tier division rating matches streak streak_type")):
+    """The handful of fields the card shows for one playlist."""
+    __slots__ = ()
+
+    @property
+    def is_loss_streak(self):
+        return self.streak_type == 'loss'
+
+
+class Profile(namedtuple("Profile", "reward_level playlists fetched_at from_snapshot")):
+    """Parsed tracker.gg profile: reward level plus one PlaylistRank per playlist.
+
+    Immutable and tuple-backed, so it is cheap to keep in views and caches and
+    to send to render worker processes."""
+    __slots__ = ()
+
+    def playlist(self, name):
+        # Later segments win, same as building a dict from the segment list
+        for rank in reversed(self.playlists):
+            if rank.playlist == name:
+                return rank
+        return None
+
+
+def _extract_segments(body):
+    """Decodes only data.segments from a raw tracker response body.
+
+    The rest of the payload (platformInfo, userInfo, availableSegments, ...) is
+    never turned into Python objects. Falls back to a full decode if the body
+    doesn't look like we expect."""
+    if isinstance(body, str):
+        body = body.encode()
+    start = body.find(b'"segments":')
+    if start > 0 and body[start - 1:start] != b'\\':
+        text = body[start + len(b'"segments":'):].decode('utf-8').lstrip()
+        try:
+            segments, _ = _decoder.raw_decode(text)
+            if isinstance(segments, list):
+                return segments
+        except ValueError:
+            pass
+    return json.loads(body)['data']['segments']
+
+
+def profile_from_segments(segments, fetched_at=None):
+    reward_level = "Unranked"
+    playlists = []
+    seen_overview = False
+    for s in segments:
+        seg_type = s.get('type')
+        stats = s.get('stats', {})
+        if seg_type == 'overview' and not seen_overview:
+            seen_overview = True
+            reward_level = stats.get('seasonRewardLevel', {}).get('metadata', {}).get('rankName', 'Unranked')
+        elif seg_type == 'playlist':
+            streak = stats.get('winStreak', {})
+            playlists.append(PlaylistRank(
+                s['metadata']['name'],
+                stats.get('tier', {}).get('metadata', {}).get('name', 'Unranked'),
+                stats.get('division', {}).get('metadata', {}).get('name', ''),
+                stats.get('rating', {}).get('value', 0),
+                stats.get('matchesPlayed', {}).get('value', 0),
+                streak.get('value', 0),
+                streak.get('metadata', {}).get('type', 'win'),
+            ))
+    return Profile(reward_level, tuple(playlists), int(fetched_at or time.time()), False)
+
+
+def parse_profile(body, fetched_at=None):
+    """Turns a raw tracker.gg profile response body (bytes or str) into a Profile."""
+    return profile_from_segments(_extract_segments(body), fetched_at)
@@ -0,0 +1,274 @@
+import asyncio
+import os
+import time
+from email.utils import parsedate_to_datetime
+
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE", "2"))          # requests per second at full speed
+UPSTREAM_MIN_RATE = float(os.getenv("UPSTREAM_MIN_RATE", "0.1"))
+UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", "5"))
+UPSTREAM_MAX_WAIT = float(os.getenv("UPSTREAM_MAX_WAIT", "20"))  # how long a command may queue
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "3"))     # consecutive blocks before opening
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))
+MAX_BACKOFF = 600
+
+BLOCK_STATUSES = (403, 429)
+
+
+class RateLimited(Exception):
+    """Raised instead of sending a request tracker.gg would most likely reject."""
+
+    def __init__(self, retry_after, reason="rate limited"):
+        super().__init__(f"Upstream {reason}, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+def parse_retry_after(value):
+    """Retry-After is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamLimiter:
+    """Token bucket shared by every tracker.gg request.
+
+    The rate halves on every 403/429 and creeps back up on success, Retry-After
+    is honoured, and after BREAKER_THRESHOLD blocks in a row the circuit opens
+    and requests fail fast until a single probe gets through. Blocks that
+    arrive while it is open are stragglers and change nothing. Waiters are
+    served strictly in arrival order."""
+
+    def __init__(self, rate=UPSTREAM_RATE, burst=UPSTREAM_BURST, min_rate=UPSTREAM_MIN_RATE,
+                 max_wait=UPSTREAM_MAX_WAIT, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, budget=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self.tokens = burst
+        self._refilled_at = time.monotonic()
+        # Optional SharedBudget: every token must also come out of the cross-process bucket
+        self.budget = budget
+        self.blocked_until = 0.0
+
+        self.state = "closed"  # closed -> open -> half_open -> closed
+        self.open_until = 0.0
+        self._open_count = 0
+        self._probe_in_flight = False
+        self.consecutive_blocks = 0
+
+        # asyncio.Lock wakes waiters in FIFO order, which makes the queue fair
+        self._queue = asyncio.Lock()
+        self.waiting = 0
+
+        self.sent = 0
+        self.rejected = 0
+        self.status_counts = {}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _check_circuit(self, now):
+        if self.state == "open":
+            if now < self.open_until:
+                raise RateLimited(self.open_until - now, "circuit open")
+            self.state = "half_open"
+        if self.state == "half_open" and self._probe_in_flight:
+            raise RateLimited(self.cooldown, "circuit half-open")
+
+    def _time_until_token(self, now):
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def _take(self):
+        self.tokens -= 1
+        self.sent += 1
+        if self.state == "half_open":
+            self._probe_in_flight = True
+
+    async def acquire(self, background=False):
+        """Waits for a send slot. Background callers never queue behind users."""
+        now = time.monotonic()
+        try:
+            self._check_circuit(now)
+            if background:
+                if self.waiting or self._queue.locked() or self._time_until_token(now) > 0:
+                    raise RateLimited(self._time_until_token(now), "busy")
+                if self.budget is not None:
+                    wait = await self.budget.take()
+                    if wait > 0:
+                        raise RateLimited(wait, "busy")
+                self._take()
+                return
+
+            deadline = now + self.max_wait
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._queue.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                raise RateLimited(self.max_wait, "queue full") from None
+            finally:
+                self.waiting -= 1
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._check_circuit(now)
+                    wait = self._time_until_token(now)
+                    if wait <= 0 and self.budget is not None:
+                        wait = await self.budget.take()
+                    if wait <= 0:
+                        self._take()
+                        return
+                    if now + wait > deadline:
+                        raise RateLimited(wait)
+                    await asyncio.sleep(wait)
+            finally:
+                self._queue.release()
+        except RateLimited:
+            self.rejected += 1
+            raise
+
+    def record(self, status_code, retry_after=None):
+        """Feeds an upstream response back into the limiter."""
+        now = time.monotonic()
+        self.status_counts[status_code] = self.status_counts.get(status_code, 0) + 1
+        self._probe_in_flight = False
+
+        if status_code in BLOCK_STATUSES or status_code >= 500:
+            if self.state == "open":
+                # Requests sent before the circuit opened, answering late:
+                # that block is already counted, don't back off again
+                return
+            self.consecutive_blocks += 1
+            if status_code in BLOCK_STATUSES:
+                # Multiplicative decrease, plus a pause of Retry-After or exponential backoff
+                self.rate = max(self.min_rate, self.rate / 2)
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = min(MAX_BACKOFF, 2 ** self.consecutive_blocks)
+                self.blocked_until = max(self.blocked_until, now + delay)
+                if self.budget is not None:
+                    self.budget.record(delay)
+            if self.state == "half_open" or self.consecutive_blocks >= self.threshold:
+                self._open(now)
+            return
+
+        # Anything else means upstream is answering normally: additive increase
+        self.consecutive_blocks = 0
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+        if self.budget is not None:
+            self.budget.record(None)
+        if self.state == "half_open":
+            self.state = "closed"
+            self._open_count = 0
+            print("✅ Tracker circuit closed again")
+
+    def record_error(self):
+        """Network errors and timeouts count towards opening the circuit."""
+        self.record(599)
+
+    def _open(self, now):
+        self._open_count += 1
+        duration = min(MAX_BACKOFF, self.cooldown * 2 ** (self._open_count - 1))
+        duration = max(duration, self.blocked_until - now)
+        self.state = "open"
+        self.open_until = now + duration
+        print(f"⚠️ Tracker circuit opened for {duration:.0f}s")
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "rate": round(self.rate, 3),
+            "tokens": round(min(self.burst, self.tokens + (now - self._refilled_at) * self.rate), 2),
+            "waiting": self.waiting,
+            "sent": self.sent,
+            "rejected": self.rejected,
+            "blocked_for_s": round(max(0.0, self.blocked_until - now), 1),
+            "open_for_s": round(max(0.0, self.open_until - now), 1) if self.state == "open" else 0,
+            "status_counts": dict(self.status_counts),
+            "shared": self.budget is not None,
+        }
+
+
+class SharedBudget:
+    """The limiter's token bucket kept in a SQLite row (db.Database), so
+    several bot processes draw from one tracker.gg budget.
+
+    Blocks seen by any process halve the shared rate and pause everyone;
+    successes creep it back up, same as UpstreamLimiter does locally."""
+
+    def __init__(self, db, rate=UPSTREAM_RATE, burst=UPSTREAM_BURST, min_rate=UPSTREAM_MIN_RATE, name="tracker"):
+        self.db = db
+        self.max_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.name = name
+
+    async def take(self):
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        return await self.db.run(self._take, self.name, self.max_rate, self.burst, time.time())
+
+    def record(self, blocked_for):
+        """Feeds an upstream response (blocked_for=None on success) into the shared rate."""
+        self.db.run_in_background(
+            self._record, self.name, self.max_rate, self.min_rate, self.burst, time.time(), blocked_for
+        )
+
+    @staticmethod
+    def _locked_update(conn, name, rate, burst, now, update):
+        # BEGIN IMMEDIATE takes the file's write lock before reading, so
+        # processes can't both spend the same token
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, refilled_at, rate, blocked_until FROM upstream_budget WHERE name = ?", (name,)
+            ).fetchone()
+            state, result = update(*(row or (burst, now, rate, 0.0)))
+            conn.execute("INSERT OR REPLACE INTO upstream_budget VALUES (?, ?, ?, ?, ?)", (name, *state))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return result
+
+    @classmethod
+    def _take(cls, conn, name, max_rate, burst, now):
+        def update(tokens, refilled_at, rate, blocked_until):
+            tokens = min(burst, tokens + max(0.0, now - refilled_at) * rate)
+            wait = max(0.0, blocked_until - now)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / rate)
+            if wait <= 0:
+                tokens -= 1
+            return (tokens, now, rate, blocked_until), wait
+        return cls._locked_update(conn, name, max_rate, burst, now, update)
+
+    @classmethod
+    def _record(cls, conn, name, max_rate, min_rate, burst, now, blocked_for):
+        def update(tokens, refilled_at, rate, blocked_until):
+            # Refill at the old rate before changing it
+            tokens = min(burst, tokens + max(0.0, now - refilled_at) * rate)
+            if blocked_for is None:
+                rate = min(max_rate, rate + max_rate / 10)
+            else:
+                rate = max(min_rate, rate / 2)
+                blocked_until = max(blocked_until, now + blocked_for)
+            return (tokens, now, rate, blocked_until), None
+        cls._locked_update(conn, name, max_rate, burst, now, update)
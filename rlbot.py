@@ -0,0 +1,641 @@
+import time
+STARTED_AT = time.monotonic()  # for the time-to-first-command log
+
+import asyncio
+import hashlib
+import importlib
+import io
+import json
+import discord
+from curl_cffi.requests import RequestsError
+from discord import app_commands
+from cache import CardCache
+from cardspec import EXTRAS_MODES, SHORT_NAMES, STANDARD_MODES, RenderBusy, card_cache_key, card_filename
+from db import Database
+from leaderboard import LEADERBOARD_PLAYLISTS, Leaderboards
+from metrics import METRICS_PORT, metrics
+from ratelimit import RateLimited, SharedBudget, UpstreamLimiter
+from scheduler import RefreshScheduler
+from shards import SHARD_IDS, SHARD_PROCESSES, SHARDED, SHARED_STATE, is_primary, launch, process_index, shard_options
+from tracker import TrackerClient, TrackerError
+import os
+from dotenv import load_dotenv
+import random # Add this at the top of your script
+import sqlite3
+
+
+# List of possible messages
+random_messages = [
+    "Chat… we pulled the ranks. It’s not looking good for bro.",
+    "We got the ranks and I’m crying.",
+    "These the ranks… imma let y’all process that.",
+    "Ranked? Yeah. Respected? Debatable.",
+    "We found the ranks and chat went silent.",
+    "{user}  This the rank? Oh nah 💀",
+    "{user}  We did the scan and I’m wheezing.",
+    "{user}  This what you wanted us to check? Crazy.",
+    "Ranks obtained. Therapist contacted.",
+    "I’d keep this private if I were you {user}.",
+    "These the ranks. I need a moment {user}.",
+    "{user}  These the ranks… imma hold your hand when I say this…",
+    "This ain’t even mid, this is tragic-core.",
+    "We pulled your ranks. You’re not him.",
+    "This ain’t leaderboard behavior.",
+    "Telemetry confirms… skill deficiency.",
+    "Packet analysis done. You not built for this..",
+    "We checked the system and the system judged you back.",
+    "These ranks just humbled the whole server.",
+    "{user} I looked it up so you didn’t have to.",
+    "System report generated. Proceed with caution.",
+    "{user} I wasn’t ready for this information.",
+]
+
+# 1. INITIAL SETUP & KEY VERIFICATION
+# Loads your custom apikey.env file
+load_dotenv("apikey.env") 
+
+TOKEN = os.getenv('DISCORD_TOKEN')
+TRACKER_KEY = os.getenv('TRACKER_KEY')
+# Set to 1 to push the command tree to Discord even if it looks unchanged
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', '0') == '1'
+
+print("--- STARTUP DEBUG CHECK ---")
+if TOKEN:
+    print(f"✅ Discord Token found: {TOKEN[:10]}...") 
+else:
+    print("❌ ERROR: 'DISCORD_TOKEN' not found in apikey.env")
+
+if TRACKER_KEY:
+    print(f"✅ Tracker API Key found: {TRACKER_KEY[:5]}...")
+else:
+    print("❌ ERROR: 'TRACKER_KEY' not found in apikey.env")
+print("---------------------------")
+
+# 2. BOT CLASS DEFINITION
+# AutoShardedClient when sharding is configured (see shards.py), a plain Client otherwise
+class RLBot(discord.AutoShardedClient if SHARDED else discord.Client):
+    def __init__(self):
+        super().__init__(intents=discord.Intents.default(), **shard_options())
+        self.tree = app_commands.CommandTree(self)
+        self.tracker = None
+        self.renderer = None
+        self.db = Database(shared=SHARED_STATE)
+        self.scheduler = None
+        self.leaderboards = None
+        self.metrics_server = None
+        # Encoded PNGs, so toggling modes or re-sending unchanged data skips rendering
+        self.cards = CardCache(store=self.db if SHARED_STATE else None)
+
+        self._renderer_task = None
+        self.ready_after = None
+        self.first_command_after = None
+
+    async def setup_hook(self):
+        # One SQLite connection for the whole bot, link index warmed up front
+        await self.db.start()
+
+        # One long-lived tracker client shared by every command and view
+        # With several shard processes, the tracker.gg budget lives in the database
+        limiter = UpstreamLimiter(budget=SharedBudget(self.db) if SHARED_STATE else None)
+        self.tracker = TrackerClient(store=self.db, limiter=limiter, shared=SHARED_STATE)
+        # Keeps linked users' profiles warm so /rankme rarely waits on tracker.gg.
+        # One per bot: only the process that owns shard 0 runs it
+        if is_primary():
+            self.scheduler = RefreshScheduler(self.tracker, self.db)
+            self.scheduler.start()
+
+        # Pillow, the card assets and the render workers load while the gateway connects
+        self._renderer_task = asyncio.create_task(self.start_renderer())
+
+        self.leaderboards = Leaderboards(self.tracker, self.db)
+
+        # Buttons are rebuilt from their custom_id, so they keep working after a restart
+        self.add_dynamic_items(ModeButton, UpdateButton, LeaderboardPageButton)
+
+        # Gauges are read lazily whenever /botstats or /metrics is requested
+        metrics.gauge("profile_cache", self.tracker.cache.stats)
+        metrics.gauge("card_cache", self.cards.stats)
+        metrics.gauge("limiter", self.tracker.limiter.stats)
+        metrics.gauge("render_pool", lambda: self.renderer.stats())
+        if self.scheduler:
+            metrics.gauge("scheduler", self.scheduler.stats)
+        metrics.gauge("leaderboard", self.leaderboards.stats)
+        metrics.gauge("startup", lambda: {"ready_s": self.ready_after, "first_command_s": self.first_command_after})
+        if METRICS_PORT:
+            # Shard processes each get their own port after the configured one
+            self.metrics_server = await metrics.serve(port=METRICS_PORT + process_index())
+
+        if is_primary():
+            await self.sync_commands()
+
+    async def start_renderer(self):
+        # Imported here so Pillow isn't loaded before we log in
+        card = await asyncio.to_thread(importlib.import_module, "card")
+        renderer = card.RenderPool()
+        try:
+            await renderer.start()
+        except Exception as e:
+            # No cards without fonts/icons, so don't keep running half broken
+            print(f"❌ Render pool failed to start: {e}")
+            renderer.shutdown()
+            await self.close()
+            return None
+        self.renderer = renderer
+        print(f"✅ Render pool ready after {time.monotonic() - STARTED_AT:.1f}s: {renderer.workers} {renderer.kind} workers")
+        return renderer
+
+    async def get_renderer(self):
+        """Returns the render pool, waiting for it if it is still warming up."""
+        if self.renderer is not None:
+            return self.renderer
+        return await asyncio.shield(self._renderer_task)
+
+    async def sync_commands(self):
+        """Syncs the command tree, but only when its definitions changed since the last sync."""
+        definitions = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        digest = hashlib.sha256(json.dumps(definitions, sort_keys=True).encode()).hexdigest()
+        key = f"command_tree_hash:{self.application_id}"
+
+        if not FORCE_COMMAND_SYNC and await self.db.get_setting(key) == digest:
+            print(f"✅ Commands unchanged, skipping sync. Logged in as: {self.user}")
+            return
+
+        # Syncs commands so they appear in Discord as /rank
+        await self.tree.sync()
+        await self.db.set_setting(key, digest)
+        print(f"✅ Commands Synced. Logged in as: {self.user}")
+
+    async def on_ready(self):
+        if self.ready_after is None:
+            self.ready_after = round(time.monotonic() - STARTED_AT, 2)
+            shards = f" (shards {SHARD_IDS or 'all'} of {self.shard_count})" if SHARDED else ""
+            print(f"⏱️ Gateway ready after {self.ready_after}s{shards}")
+
+    async def on_interaction(self, interaction):
+        if self.first_command_after is None:
+            self.first_command_after = round(time.monotonic() - STARTED_AT, 2)
+            print(f"⏱️ First interaction after {self.first_command_after}s")
+
+    async def on_app_command_completion(self, interaction, command):
+        observe_total(f"cmd_{command.name}", interaction)
+
+    async def close(self):
+        if self.metrics_server:
+            self.metrics_server.close()
+        if self.scheduler:
+            await self.scheduler.stop()
+        if self.tracker:
+            await self.tracker.close()
+        if self.renderer:
+            self.renderer.shutdown()
+        await self.db.close()
+        await super().close()
+
+bot = RLBot()
+
+def observe_total(name, interaction):
+    """Records end-to-end latency from Discord creating the interaction until now."""
+    if metrics.sampled():
+        metrics.observe(name, (discord.utils.utcnow() - interaction.created_at).total_seconds())
+
+
+def card_message(interaction, profile):
+    """Picks the flavour text, noting when the ranks come from a saved snapshot."""
+    selected_text = random.choice(random_messages).format(user=interaction.user.mention)
+    if profile.from_snapshot:
+        selected_text += f"\n📦 Tracker.gg is unavailable, showing saved ranks from <t:{profile.fetched_at}:R>."
+    return selected_text
+
+
+def rating_changes(previous, profile, mode_type):
+    """["Ranked 2v2 +14", "Ranked 3v3 -9"] for the card's playlists whose MMR moved."""
+    changes = []
+    for name in (EXTRAS_MODES if mode_type == "extras" else STANDARD_MODES):
+        before, after = previous.playlist(name), profile.playlist(name)
+        if before is None or after is None or before.rating == after.rating:
+            continue
+        changes.append(f"{SHORT_NAMES.get(name, name)} {round(after.rating - before.rating):+d}")
+    return changes
+
+
+async def render_card(username, platform_name, display_name, profile, mode_type="standard"):
+    """Returns card PNG bytes, reusing an earlier render of identical content."""
+    def card_job(mode):
+        key = card_cache_key(platform_name, display_name, profile, mode)
+        async def render():
+            renderer = await bot.get_renderer()
+            return await renderer.render(username, platform_name, display_name, profile, mode_type=mode)
+        return key, render
+
+    png = await bot.cards.get(*card_job(mode_type))
+
+    # Warm the other mode so the Extras/Standard toggle answers right away
+    bot.cards.prefetch(*card_job("extras" if mode_type == "standard" else "standard"))
+    return png
+
+
+async def send_button_card(interaction, platform, username, mode):
+    """Posts a fresh card for a button click, resolving the profile through the cache."""
+    # 1. Defer to give PIL time to generate the image
+    await interaction.response.defer()
+
+    try:
+        with metrics.span("lookup"):
+            profile = await bot.tracker.get_profile(platform, username)
+        with metrics.span("render"):
+            png = await render_card(username, platform, username, profile, mode_type=mode)
+        file = discord.File(fp=io.BytesIO(png), filename=card_filename())
+
+        # 3. Send the brand new card as a follow-up
+        selected_text = card_message(interaction, profile)
+
+        with metrics.span("send"):
+            await interaction.followup.send(
+                content=selected_text,
+                file=file,
+                view=RankView(platform, username, mode, profile)
+            )
+    except RenderBusy:
+        return await interaction.followup.send("⏳ The bot is busy drawing cards, try again in a few seconds.", ephemeral=True)
+    except (TrackerError, RateLimited, RequestsError) as e:
+        print(f"DEBUG Button lookup failed: {e}")
+        return await interaction.followup.send("❌ Could not fetch stats right now, try again later.", ephemeral=True)
+    except Exception as e:
+        print(f"DEBUG Button error: {e}")
+        return await interaction.followup.send("❌ An unexpected error occurred. Check terminal for logs.", ephemeral=True)
+    observe_total("view_button", interaction)
+
+
+def card_digest(platform, username, profile, mode):
+    """Short content hash of a card, kept in its Update button's custom_id."""
+    return card_cache_key(platform, username, profile, mode)[:8]
+
+
+async def update_card(interaction, platform, username, mode, shown, digest=None):
+    """Update button: re-checks the ranks a card was drawn from (fetched at `shown`).
+
+    Nothing changed (same `digest`): a short ephemeral note, no render or
+    upload. Otherwise the card is edited in place, with the MMR changes
+    since `shown` in the message."""
+    await interaction.response.defer()
+
+    try:
+        with metrics.span("lookup"):
+            profile = await bot.tracker.get_profile(platform, username)
+
+        if digest == card_digest(platform, username, profile, mode):
+            metrics.count("card_update", "unchanged")
+            if profile.from_snapshot:
+                note = f"📦 Tracker.gg is unavailable, no newer ranks than <t:{shown}:t>."
+            else:
+                note = f"🕒 No change since <t:{shown}:t> (checked <t:{profile.fetched_at}:R>)."
+            await interaction.followup.send(note, ephemeral=True)
+            observe_total("view_button", interaction)
+            return
+
+        # Only used for the deltas: playlists added or removed since don't show up in them
+        previous = await bot.db.snapshot_at(platform, username, shown)
+        with metrics.span("render"):
+            png = await render_card(username, platform, username, profile, mode_type=mode)
+        metrics.count("card_update", "changed")
+        file = discord.File(fp=io.BytesIO(png), filename=card_filename())
+
+        selected_text = card_message(interaction, profile)
+        changes = rating_changes(previous, profile, mode) if previous is not None else []
+        if changes:
+            selected_text += f"\n📊 Since <t:{shown}:t>: " + " · ".join(changes)
+
+        # Swap the card on the existing message instead of posting another one
+        with metrics.span("send"):
+            await interaction.edit_original_response(
+                content=selected_text,
+                attachments=[file],
+                view=RankView(platform, username, mode, profile)
+            )
+    except RenderBusy:
+        return await interaction.followup.send("⏳ The bot is busy drawing cards, try again in a few seconds.", ephemeral=True)
+    except (TrackerError, RateLimited, RequestsError) as e:
+        print(f"DEBUG Update lookup failed: {e}")
+        return await interaction.followup.send("❌ Could not fetch stats right now, try again later.", ephemeral=True)
+    except Exception as e:
+        print(f"DEBUG Update error: {e}")
+        return await interaction.followup.send("❌ An unexpected error occurred. Check terminal for logs.", ephemeral=True)
+    observe_total("view_button", interaction)
+
+
+# Buttons are DynamicItems: the custom_id carries the mode, platform and
+# username, so no per-message state is kept and old cards keep working
+# after a restart.
+class ModeButton(discord.ui.DynamicItem[discord.ui.Button], template=r"rank:mode:(?P<mode>standard|extras):(?P<platform>[a-z]+):(?P<username>.+)"):
+    def __init__(self, platform, username, mode):
+        self.platform = platform
+        self.username = username
+        self.mode = mode  # the mode the card is currently showing
+        # Toggle logic: If standard, offer extras and vice-versa
+        if mode == "standard":
+            label, emoji = "Extras", "🏀"
+        else:
+            label, emoji = "Standard", "⚽"  # Football for Extra Modes
+        super().__init__(discord.ui.Button(
+            label=label, emoji=emoji, style=discord.ButtonStyle.gray,
+            custom_id=f"rank:mode:{mode}:{platform}:{username}",
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["platform"], match["username"], match["mode"])
+
+    async def callback(self, interaction: discord.Interaction):
+        new_mode = "extras" if self.mode == "standard" else "standard"
+        await send_button_card(interaction, self.platform, self.username, new_mode)
+
+
+# `shown` is the fetched_at of the ranks on the card and `digest` its
+# card_digest, so Update can tell whether anything changed. Cards from
+# before they were added have neither, or only `shown`.
+class UpdateButton(discord.ui.DynamicItem[discord.ui.Button], template=r"rank:update:(?P<mode>standard|extras):(?:(?P<shown>\d+)(?:\.(?P<digest>[0-9a-f]+))?:)?(?P<platform>[a-z]+):(?P<username>.+)"):
+    def __init__(self, platform, username, mode, shown=None, digest=None):
+        self.platform = platform
+        self.username = username
+        self.mode = mode
+        self.shown = shown
+        self.digest = digest
+        stamp = ""
+        if shown is not None:
+            stamp = f"{shown}.{digest}:" if digest else f"{shown}:"
+        super().__init__(discord.ui.Button(
+            label="Update", emoji="🔄", style=discord.ButtonStyle.gray,
+            custom_id=f"rank:update:{mode}:{stamp}{platform}:{username}",
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        shown = int(match["shown"]) if match["shown"] else None
+        return cls(match["platform"], match["username"], match["mode"], shown, match["digest"])
+
+    async def callback(self, interaction: discord.Interaction):
+        # Refresh uses the same mode we are currently on
+        if self.shown is None:
+            return await send_button_card(interaction, self.platform, self.username, self.mode)
+        await update_card(interaction, self.platform, self.username, self.mode, self.shown, self.digest)
+
+
+class RankView(discord.ui.View):
+    """Extras/Update buttons for a card. Holds no profile data: `profile` only
+    stamps the Update button with what the card shows."""
+
+    def __init__(self, platform, username, mode="standard", profile=None):
+        super().__init__(timeout=None)
+        if profile is not None:
+            update = UpdateButton(platform, username, mode, profile.fetched_at, card_digest(platform, username, profile, mode))
+        else:
+            update = UpdateButton(platform, username, mode)
+        # custom_ids are capped at 100 characters
+        if len(update.custom_id) <= 100:
+            self.add_item(ModeButton(platform, username, mode))
+            self.add_item(update)
+
+
+# 3. THE RANK COMMAND
+@bot.tree.command(name="rank", description="Get Rocket League ranks by searching Username")
+@app_commands.describe(platform="Platform (epic, steam, psn, xbl)", username="Player ID")
+
+@app_commands.choices(platform=[
+    app_commands.Choice(name="Epic Games", value="epic"),
+    app_commands.Choice(name="Steam", value="steam"),
+    app_commands.Choice(name="PlayStation", value="psn"),
+    app_commands.Choice(name="Xbox", value="xbl")
+])
+async def rank(interaction: discord.Interaction, platform: app_commands.Choice[str], username: str):
+
+    await interaction.response.defer()
+    
+    # Add a tiny "human" delay
+    with metrics.span("human_delay"):
+        await asyncio.sleep(random.uniform(0.5, 1.5))
+    
+    # if(username.lower()=="akshattyagi05"):
+    #     display_name= "AkshatTyagi05"
+    #     username="iiRw9"
+    # else:
+    #     display_name= username
+    display_name= username
+
+    try:
+        with metrics.span("lookup"):
+            profile = await bot.tracker.get_profile(platform.value, username)
+
+        view = RankView(platform.value, username, profile=profile)
+
+        # Generate the initial "standard" image
+        with metrics.span("render"):
+            png = await render_card(username, platform.value, display_name, profile, mode_type="standard")
+        file = discord.File(fp=io.BytesIO(png), filename=card_filename())
+
+        # Send the message with both the file and the buttons
+        selected_text = card_message(interaction, profile)
+
+        with metrics.span("send"):
+            await interaction.followup.send(
+                content=selected_text,
+                file=file,
+                view=view
+            )
+
+    except RenderBusy:
+        await interaction.followup.send("⏳ The bot is busy drawing cards, try again in a few seconds.")
+
+    except RateLimited as e:
+        await interaction.followup.send(f"⏳ Tracker.gg is limiting us right now, try again in {e.retry_after:.0f}s.")
+
+    except TrackerError as e:
+        if e.status_code == 401:
+            await interaction.followup.send("❌ 401: API Key rejected. Check TRN-Api-Key in apikey.env")
+        elif e.status_code == 403:
+            await interaction.followup.send("❌ 403: Access Forbidden. Tracker.gg is blocking the request.")
+        elif e.status_code == 404:
+            await interaction.followup.send(f"❌ 404: Player `{username}` not found. Check platform and ID.")
+        else:
+            await interaction.followup.send(f"❌ API Error: Status {e.status_code}")
+
+    except Exception as e:
+        print(f"DEBUG Error: {e}")
+        await interaction.followup.send("❌ An unexpected error occurred. Check terminal for logs.")
+
+
+
+@bot.tree.command(name="ranklink", description="Link your Rocket League account to your Discord ID")
+@app_commands.describe(platform="Select your platform", username="Your Rocket League Username/ID")
+# Add the choices decorator here
+@app_commands.choices(platform=[
+    app_commands.Choice(name="Epic Games", value="epic"),
+    app_commands.Choice(name="Steam", value="steam"),
+    app_commands.Choice(name="PlayStation", value="psn"),
+    app_commands.Choice(name="Xbox", value="xbl")
+])
+async def ranklink(interaction: discord.Interaction, platform: app_commands.Choice[str], username: str):
+    await interaction.response.defer(ephemeral=True)
+
+    try:
+        # Writes are batched; this returns once the link is committed
+        await bot.db.link_user(interaction.user.id, username, platform.value)
+        bot.db.remember_members(interaction.guild_id, [interaction.user.id])
+        if bot.scheduler:
+            bot.scheduler.touch(interaction.user.id)
+        elif SHARED_STATE:
+            bot.db.record_activity(interaction.user.id)
+
+        await interaction.followup.send(f"✅ Successfully linked **{username}** ({platform.name})!")
+        
+    except sqlite3.Error as e:
+        await interaction.followup.send(f"❌ Database Error: {e}")
+
+
+
+@bot.tree.command(name="rankme", description="Show your own Rocket League ranks")
+async def rankme(interaction: discord.Interaction):
+    await interaction.response.defer()
+
+    # 1. Check the link index for the user (the table itself when shard processes share it)
+    result = await bot.db.find_link(interaction.user.id)
+    bot.db.remember_members(interaction.guild_id, [interaction.user.id])
+    if bot.scheduler:
+        bot.scheduler.touch(interaction.user.id)
+    elif SHARED_STATE:
+        # The scheduler runs in the primary process and reads this each cycle
+        bot.db.record_activity(interaction.user.id)
+    
+    if not result:
+        return await interaction.followup.send("❌ You haven't linked your account! Use `/ranklink` first.")
+    
+    saved_username, saved_platform = result
+    
+    # 2. Reuse the shared tracker client
+    try:
+        with metrics.span("lookup"):
+            profile = await bot.tracker.get_profile(saved_platform, saved_username)
+
+        # Using your existing View and Card functions
+        view = RankView(saved_platform, saved_username, profile=profile)
+        with metrics.span("render"):
+            png = await render_card(saved_username, saved_platform, saved_username, profile)
+        file = discord.File(fp=io.BytesIO(png), filename=card_filename())
+
+        selected_text = card_message(interaction, profile)
+        with metrics.span("send"):
+            await interaction.followup.send(content=selected_text, file=file, view=view)
+    except RenderBusy:
+        await interaction.followup.send("⏳ The bot is busy drawing cards, try again in a few seconds.")
+    except RateLimited as e:
+        await interaction.followup.send(f"⏳ Tracker.gg is limiting us right now, try again in {e.retry_after:.0f}s.")
+    except TrackerError:
+        await interaction.followup.send("❌ Could not fetch stats. Your linked account might be private or invalid.")
+    except Exception as e:
+        print(f"DEBUG Error: {e}")
+        await interaction.followup.send("❌ An error occurred while fetching your ranks.")
+
+# 4. SERVER LEADERBOARD
+class LeaderboardPageButton(discord.ui.DynamicItem[discord.ui.Button], template=r"lb:(?P<playlist>\d+):(?P<page>\d+):(?P<direction>prev|next)"):
+    def __init__(self, playlist_index, page, direction, disabled=False):
+        self.playlist_index = playlist_index
+        self.page = page  # the page this button leads to
+        self.direction = direction
+        super().__init__(discord.ui.Button(
+            label="Previous" if direction == "prev" else "Next",
+            emoji="◀️" if direction == "prev" else "▶️",
+            style=discord.ButtonStyle.gray,
+            custom_id=f"lb:{playlist_index}:{page}:{direction}",
+            disabled=disabled,
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["playlist"]), int(match["page"]), match["direction"])
+
+    async def callback(self, interaction: discord.Interaction):
+        # Edits the leaderboard message in place
+        await interaction.response.defer()
+        try:
+            board = await bot.leaderboards.get(interaction.guild, LEADERBOARD_PLAYLISTS[self.playlist_index])
+            file, view = await leaderboard_page(board, self.playlist_index, self.page)
+            await interaction.edit_original_response(attachments=[file], view=view)
+        except RenderBusy:
+            await interaction.followup.send("⏳ The bot is busy drawing cards, try again in a few seconds.", ephemeral=True)
+        except Exception as e:
+            print(f"DEBUG Leaderboard page error: {e}")
+            await interaction.followup.send("❌ Could not build the leaderboard. Check terminal for logs.", ephemeral=True)
+
+
+async def leaderboard_page(board, playlist_index, page):
+    """Renders one page of a board. Returns (discord.File, view)."""
+    page = max(0, min(page, board.pages - 1))
+    with metrics.span("render"):
+        renderer = await bot.get_renderer()
+        png = await renderer.render_leaderboard(board.playlist, board.page_rows(page), board.footer(page))
+    file = discord.File(fp=io.BytesIO(png), filename=card_filename("leaderboard"))
+
+    view = discord.ui.View(timeout=None)
+    view.add_item(LeaderboardPageButton(playlist_index, max(page - 1, 0), "prev", disabled=page == 0))
+    view.add_item(LeaderboardPageButton(playlist_index, min(page + 1, board.pages - 1), "next", disabled=page >= board.pages - 1))
+    return file, view
+
+
+@bot.tree.command(name="leaderboard", description="Rank this server's linked players by MMR")
+@app_commands.describe(playlist="Playlist to rank by (default: Ranked 2v2)")
+@app_commands.choices(playlist=[
+    app_commands.Choice(name=SHORT_NAMES.get(name, name), value=str(i))
+    for i, name in enumerate(LEADERBOARD_PLAYLISTS)
+])
+@app_commands.guild_only()
+async def leaderboard(interaction: discord.Interaction, playlist: app_commands.Choice[str] = None):
+    await interaction.response.defer()
+    bot.db.remember_members(interaction.guild_id, [interaction.user.id])
+
+    playlist_index = int(playlist.value) if playlist else LEADERBOARD_PLAYLISTS.index('Ranked Doubles 2v2')
+    try:
+        with metrics.span("lookup"):
+            board = await bot.leaderboards.get(interaction.guild, LEADERBOARD_PLAYLISTS[playlist_index])
+        if not board.standings:
+            return await interaction.followup.send("❌ Nobody in this server has linked an account yet. Use `/ranklink` first.")
+
+        file, view = await leaderboard_page(board, playlist_index, 0)
+        with metrics.span("send"):
+            await interaction.followup.send(
+                content=f"🏆 **{interaction.guild.name}** ranks, updated <t:{board.built_at}:R>",
+                file=file,
+                view=view
+            )
+    except RenderBusy:
+        await interaction.followup.send("⏳ The bot is busy drawing cards, try again in a few seconds.")
+    except Exception as e:
+        print(f"DEBUG Leaderboard error: {e}")
+        await interaction.followup.send("❌ Could not build the leaderboard. Check terminal for logs.")
+
+
+@bot.tree.command(name="botstats", description="Show bot latency, upstream and cache statistics")
+@app_commands.guild_only()
+@app_commands.default_permissions(administrator=True)
+@app_commands.checks.has_permissions(administrator=True)
+async def botstats(interaction: discord.Interaction):
+    report = metrics.render_text()
+    # Stay inside Discord's 2000 character message limit
+    if len(report) > 1900:
+        report = report[:1900] + "\n…"
+    await interaction.response.send_message(f"```\n{report}\n```", ephemeral=True)
+
+
+# 5. RUN THE BOT
+# Called from main.py, the entry point
+def main():
+    if not TOKEN:
+        return
+    if SHARD_PROCESSES > 1 and not SHARD_IDS:
+        # Supervisor: one child process per slice of shards, no client here
+        launch(os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"))
+    else:
+        bot.run(TOKEN)
+    # if(username.lower=="akshattyagi05"):
+    #     display_name= "AkshatTyagi05"
+    #     username="iiRw9"
+    # else:
+    #     display_name= username
\ No newline at end of file
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import random
+import time
+
+from curl_cffi.requests import RequestsError
+
+from ratelimit import RateLimited
+from tracker import TrackerError
+
+REFRESH_CYCLE_SECONDS = float(os.getenv("REFRESH_CYCLE_SECONDS", "30"))
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "4"))
+REFRESH_SPACING = float(os.getenv("REFRESH_SPACING", "0.5"))       # seconds between launches, jittered
+REFRESH_MAX_PER_CYCLE = int(os.getenv("REFRESH_MAX_PER_CYCLE", "50"))
+ACTIVE_WINDOW = float(os.getenv("REFRESH_ACTIVE_WINDOW", str(3 * 86400)))
+IDLE_REFRESH_AGE = float(os.getenv("REFRESH_IDLE_AGE", "3600"))
+MAX_BACKOFF = 900
+
+
+class RefreshScheduler:
+    """Keeps linked users' profiles warm in the tracker cache.
+
+    Recently active users are refreshed before their cached profile falls
+    out of the stale window; everyone else at most every IDLE_REFRESH_AGE."""
+
+    def __init__(self, tracker, db):
+        self.tracker = tracker
+        self.db = db
+        self.last_active = {}  # discord_id -> time.time() of their last command
+        # (platform, username.lower()) -> time.time() of our last attempt. The
+        # profile cache is an LRU and forgets users once there are more links
+        # than it holds, so its ages alone would make those users due forever.
+        self.refreshed_at = {}
+        self._task = None
+
+        self.paused_until = 0
+        self._backoff = 0
+
+        # Exposed through stats()
+        self.queue_depth = 0
+        self.cycles = 0
+        self.last_cycle = {}
+        self.refreshed = 0
+        self.failed = 0
+
+    def touch(self, discord_id):
+        """Marks a Discord user as active so their profile is kept fresher."""
+        self.last_active[discord_id] = time.time()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(REFRESH_CYCLE_SECONDS * random.uniform(0.8, 1.2))
+            if time.time() < self.paused_until:
+                continue
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                print(f"DEBUG Refresh cycle failed: {e}")
+
+    def due_users(self):
+        """Returns [(lag, platform, username)] that need a refresh, most urgent first."""
+        now = time.time()
+        cache = self.tracker.cache
+        active_age = cache.ttl + cache.stale / 2
+
+        active, idle, seen = [], [], set()
+        for discord_id, (username, platform) in self.db.links.items():
+            key = (platform, username.lower())
+            if key in seen:
+                continue
+            seen.add(key)
+
+            age = self.tracker.cache_age(platform, username)
+            if key in self.refreshed_at:
+                since = now - self.refreshed_at[key]
+                age = since if age is None else min(age, since)
+            last_active = self.last_active.get(discord_id, 0)
+            if now - last_active < ACTIVE_WINDOW:
+                if age is None or age > active_age:
+                    lag = 0 if age is None else age - active_age
+                    active.append((last_active, lag, platform, username))
+            elif age is None or age > IDLE_REFRESH_AGE:
+                lag = 0 if age is None else age - IDLE_REFRESH_AGE
+                idle.append((lag, platform, username))
+
+        # Most recently active first, then the idle users that have waited longest
+        active.sort(key=lambda u: u[0], reverse=True)
+        idle.sort(key=lambda u: u[0], reverse=True)
+        return [(lag, p, u) for _, lag, p, u in active] + idle
+
+    async def run_cycle(self):
+        started = time.monotonic()
+        # Shard processes link users too; pick up their rows
+        await self.db.refresh_links()
+        if self.db.shared:
+            # ...and record who is active there (see Database.record_activity)
+            for discord_id, last_active in (await self.db.recent_activity(time.time() - ACTIVE_WINDOW)).items():
+                self.last_active[discord_id] = max(self.last_active.get(discord_id, 0), last_active)
+        due = self.due_users()
+        batch = due[:REFRESH_MAX_PER_CYCLE]
+        self.queue_depth = len(due)
+
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+        results = {"ok": 0, "failed": 0, "max_lag": max((lag for lag, _, _ in batch), default=0)}
+        blocked = asyncio.Event()   # upstream said 403/429: back off
+        out_of_budget = False       # the shared limiter had nothing to spare: just end the cycle
+
+        async def refresh(platform, username):
+            nonlocal out_of_budget
+            async with semaphore:
+                if blocked.is_set() or out_of_budget:
+                    return
+                key = (platform, username.lower())
+                try:
+                    await self.tracker.refresh_profile(platform, username)
+                    results["ok"] += 1
+                    self.refreshed_at[key] = time.time()
+                except TrackerError as e:
+                    results["failed"] += 1
+                    if e.status_code in (403, 429):
+                        blocked.set()
+                    else:
+                        # e.g. a 404: wait the usual interval before asking again
+                        self.refreshed_at[key] = time.time()
+                except RateLimited:
+                    # The shared limiter has no spare budget; leave it to user commands
+                    out_of_budget = True
+                except (RequestsError, asyncio.TimeoutError):
+                    results["failed"] += 1
+                finally:
+                    self.queue_depth -= 1
+
+        tasks = []
+        for _, platform, username in batch:
+            if blocked.is_set() or out_of_budget:
+                break
+            tasks.append(asyncio.create_task(refresh(platform, username)))
+            # Jittered spacing so refreshes don't arrive at tracker.gg in bursts
+            await asyncio.sleep(REFRESH_SPACING * random.uniform(0.5, 1.5))
+        await asyncio.gather(*tasks)
+
+        if blocked.is_set():
+            # Upstream is pushing back: stop refreshing for a while
+            self._backoff = min(MAX_BACKOFF, max(REFRESH_CYCLE_SECONDS, self._backoff * 2))
+            self.paused_until = time.time() + self._backoff
+            print(f"⚠️ Refresh scheduler paused for {self._backoff:.0f}s after upstream block")
+        else:
+            self._backoff = 0
+
+        self.cycles += 1
+        self.refreshed += results["ok"]
+        self.failed += results["failed"]
+        self.last_cycle = {
+            "due": len(due),
+            "attempted": len(tasks),
+            "refreshed": results["ok"],
+            "failed": results["failed"],
+            "max_lag_s": round(results["max_lag"], 1),
+            "duration_s": round(time.monotonic() - started, 2),
+        }
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth,
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "paused_for_s": max(0, round(self.paused_until - time.time())),
+            "last_cycle": self.last_cycle,
+        }
@@ -0,0 +1,72 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# SHARD_PROCESSES > 1 turns `python main.py` into a supervisor that starts one
+# bot process per slice of shards. Those processes share caches and the
+# tracker.gg budget through the SQLite file (see SHARED_STATE).
+SHARD_PROCESSES = int(os.getenv("SHARD_PROCESSES", "1"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", str(SHARD_PROCESSES if SHARD_PROCESSES > 1 else 0)))  # 0: unsharded
+SHARD_IDS = os.getenv("SHARD_IDS")  # "0,2": set by the supervisor for each child
+SHARDED = SHARD_COUNT > 0 or os.getenv("SHARDED", "0") == "1"   # SHARDED=1 alone lets Discord pick the count
+SHARED_STATE = os.getenv("SHARED_STATE", "1" if SHARD_PROCESSES > 1 else "0") == "1"
+RESTART_DELAY = 5
+
+
+def shard_options():
+    """Keyword arguments for discord.AutoShardedClient."""
+    if not SHARDED:
+        return {}
+    options = {"shard_count": SHARD_COUNT or None}
+    if SHARD_IDS:
+        options["shard_ids"] = [int(i) for i in SHARD_IDS.split(",")]
+    return options
+
+
+def is_primary():
+    """The process that owns shard 0 runs the once-per-bot jobs (command sync, refresh scheduler)."""
+    return not SHARD_IDS or "0" in SHARD_IDS.split(",")
+
+
+def process_index():
+    """0 for the primary / unsharded process, otherwise this process' slot under the supervisor."""
+    return int(os.getenv("SHARD_PROCESS_INDEX", "0"))
+
+
+def split_shards(shard_count, processes):
+    """Deals shard ids round-robin: 5 shards over 2 processes -> [[0, 2, 4], [1, 3]]."""
+    return [list(range(i, shard_count, processes)) for i in range(processes) if i < shard_count]
+
+
+def launch(script, processes=SHARD_PROCESSES, shard_count=SHARD_COUNT):
+    """Runs one child per shard slice and restarts any that exit, until interrupted."""
+    slices = split_shards(shard_count, processes)
+    children = {}
+
+    def start(index):
+        env = dict(os.environ, SHARD_IDS=",".join(map(str, slices[index])), SHARD_PROCESS_INDEX=str(index))
+        children[index] = subprocess.Popen([sys.executable, script], env=env)
+        print(f"✅ Shard process {index} started (pid {children[index].pid}, shards {slices[index]})")
+
+    def stop(signum, frame):
+        for child in children.values():
+            child.send_signal(signal.SIGTERM)
+        for child in children.values():
+            child.wait()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"--- Launching {len(slices)} shard processes for {shard_count} shards ---")
+    for index in range(len(slices)):
+        start(index)
+    while True:
+        time.sleep(1)
+        for index, child in list(children.items()):
+            if child.poll() is not None:
+                print(f"⚠️ Shard process {index} exited with {child.returncode}, restarting in {RESTART_DELAY}s")
+                time.sleep(RESTART_DELAY)
+                start(index)
@@ -0,0 +1,80 @@
+"""draw_slanted_gradient must stay pixel-identical to the original column-by-column version."""
+import os
+import random
+import sys
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from card import draw_slanted_gradient  # noqa: E402
+
+SIZE = (900, 600)
+HEADER = ((85, 200, 255, 100), (170, 100, 255, 100), [(25, 20), (450, 20), (420, 85), (25, 85)])
+
+
+def baseline_slanted_gradient(draw, base_img, start_color, end_color, polygon_coords):
+    """The implementation before user-006, kept verbatim as the reference."""
+    # Find the bounds of the polygon
+    min_x = min(p[0] for p in polygon_coords)
+    max_x = max(p[0] for p in polygon_coords)
+
+    # Create a mask for the slanted shape
+    mask = Image.new('L', base_img.size, 0)
+    mask_draw = ImageDraw.Draw(mask)
+    mask_draw.polygon(polygon_coords, fill=255)
+
+    # Create the gradient overlay
+    gradient = Image.new('RGBA', base_img.size)
+    for x in range(min_x, max_x + 1):
+        # Calculate the color at this X position
+        mix = (x - min_x) / (max_x - min_x)
+        r = int(start_color[0] + (end_color[0] - start_color[0]) * mix)
+        g = int(start_color[1] + (end_color[1] - start_color[1]) * mix)
+        b = int(start_color[2] + (end_color[2] - start_color[2]) * mix)
+        a = start_color[3] if len(start_color) > 3 else 255
+
+        # Draw a vertical line for this color step
+        draw_grad = ImageDraw.Draw(gradient)
+        draw_grad.line([(x, 0), (x, base_img.height)], fill=(r, g, b, a))
+
+    # Paste the gradient onto the base image using the slanted mask
+    base_img.paste(gradient, (0, 0), mask=mask)
+
+
+def background(seed):
+    """A noisy RGBA base, so any difference in blending shows up."""
+    return Image.frombytes('RGBA', SIZE, random.Random(seed).randbytes(SIZE[0] * SIZE[1] * 4))
+
+
+def render(fn, seed, start_color, end_color, polygon_coords):
+    base = background(seed)
+    fn(ImageDraw.Draw(base), base, start_color, end_color, polygon_coords)
+    return base.tobytes()
+
+
+def random_case(rng):
+    color = lambda: tuple(rng.randrange(256) for _ in range(rng.choice((3, 4))))
+    points = [(rng.randrange(SIZE[0]), rng.randrange(SIZE[1])) for _ in range(rng.randrange(3, 7))]
+    # The baseline divides by the polygon's width
+    if min(p[0] for p in points) == max(p[0] for p in points):
+        points[0] = ((points[0][0] + 1) % SIZE[0], points[0][1])
+    return color(), color(), points
+
+
+def test_header_matches_baseline():
+    assert render(draw_slanted_gradient, 0, *HEADER) == render(baseline_slanted_gradient, 0, *HEADER)
+
+
+def test_memoized_repeat_matches_baseline():
+    # The second call is served from the patch cache
+    for seed in (1, 2):
+        assert render(draw_slanted_gradient, seed, *HEADER) == render(baseline_slanted_gradient, seed, *HEADER)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_random_polygons_match_baseline(seed):
+    start_color, end_color, points = random_case(random.Random(seed))
+    expected = render(baseline_slanted_gradient, seed, start_color, end_color, points)
+    assert render(draw_slanted_gradient, seed, start_color, end_color, points) == expected